@@ -0,0 +1 @@
+# the generator is in main.py, run it with python -m petus (see python -m petus --help)
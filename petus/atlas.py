@@ -0,0 +1,123 @@
+from hashlib import sha1
+import json
+import math
+import os
+
+# Textured export. The sprites of the blocks in the palette are packed into one atlas texture, so the
+# whole mesh can use a single material with per-face uvs pointing at each block's tile, instead of a
+# usemtl switch for every block. Building the atlas is cached by a hash of the sprite directory.
+
+SPRITE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "block-sprites")
+TILE = 16  # sprites are 16x16, animated ones are frames stacked on top of each other
+
+# sprites for blocks that aren't named after the block
+SPRITES = {"grass": "grass_block_top", "water": "water_still"}
+
+# sprites minecraft colours in by biome, they're grey in the files
+TINTS = {"grass_block_top": (124, 189, 107), "water_still": (63, 118, 228)}
+
+
+def sprite_hash(sprite_dir: str = SPRITE_DIR) -> str:
+    h = sha1()
+
+    for name in sorted(os.listdir(sprite_dir)):
+        if name.endswith(".png"):
+            h.update(name.encode())
+
+            with open(os.path.join(sprite_dir, name), "rb") as f:
+                h.update(f.read())
+
+    return h.hexdigest()
+
+
+def build_atlas(blocks: list, sprite_dir: str = SPRITE_DIR, cache_dir: str = ".cache") -> dict:
+    """Packs the sprites of blocks into one texture, or loads it from cache_dir if it was already built.
+
+    Returns {"image": path to the png, "tiles": {block: [u1, v1, u2, v2]}}.
+    """
+
+    sprites = [SPRITES.get(b, b) for b in blocks]
+    key = sha1((sprite_hash(sprite_dir) + json.dumps([blocks, sprites, TINTS])).encode()).hexdigest()[:16]
+    path = os.path.join(cache_dir, f"atlas-{key}")
+
+    if os.path.exists(path + ".json") and os.path.exists(path + ".png"):
+        with open(path + ".json") as f:
+            return json.load(f)
+
+    from PIL import Image, ImageChops  # pip install pillow
+
+    columns = math.ceil(math.sqrt(len(blocks)))
+    rows = math.ceil(len(blocks) / columns)
+    w, h = columns * TILE, rows * TILE
+
+    image = Image.new("RGBA", (w, h))
+    tiles = {}
+
+    for i, (block, sprite) in enumerate(zip(blocks, sprites)):
+        tile = Image.open(os.path.join(sprite_dir, sprite + ".png")).convert("RGBA").crop((0, 0, TILE, TILE))
+
+        if sprite in TINTS:
+            tile = ImageChops.multiply(tile, Image.new("RGBA", tile.size, (*TINTS[sprite], 255)))
+
+        x = (i % columns) * TILE
+        y = (i // columns) * TILE
+        image.paste(tile, (x, y))
+
+        # v goes up from the bottom of the image in obj files, and the tile is inset by half a pixel so
+        # the ones next to it don't bleed in when it's filtered
+        tiles[block] = [(x + 0.5) / w, 1 - (y + TILE - 0.5) / h, (x + TILE - 0.5) / w, 1 - (y + 0.5) / h]
+
+    os.makedirs(cache_dir, exist_ok=True)
+    image.save(path + ".png")
+
+    atlas = {"image": path + ".png", "tiles": tiles}
+
+    with open(path + ".json", "w") as f:
+        json.dump(atlas, f)
+
+    return atlas
+
+
+def uv_table(atlas: dict) -> tuple:
+    """The obj vt lines for every tile's 4 corners, and the index of each block's first one."""
+
+    lines = []
+    first = {}
+
+    for block, (u1, v1, u2, v2) in atlas["tiles"].items():
+        first[block] = len(lines) + 1
+        lines += [f"vt {u1:.6f} {v1:.6f}", f"vt {u2:.6f} {v1:.6f}", f"vt {u2:.6f} {v2:.6f}", f"vt {u1:.6f} {v2:.6f}"]
+
+    return "\n".join(lines) + "\n", first
+
+
+def write_mtl(path: str, atlas: dict) -> None:
+    image = os.path.relpath(atlas["image"], os.path.dirname(os.path.abspath(path)))
+
+    with open(path, "w") as f:
+        f.write(f"newmtl atlas\nKd 1.00 1.00 1.00\nmap_Kd {image}\n")
+
+
+def textured_header(path: str, palette: dict, cache_dir: str = ".cache") -> tuple:
+    """Writes the mtl file for an obj file at path, returns the start of the obj and the vt indices for
+    MeshCache() / mesh_section()."""
+
+    atlas = build_atlas([palette[i] for i in range(1, 13)], cache_dir=cache_dir)
+    uvs, first = uv_table(atlas)
+    mtl = os.path.splitext(path)[0] + ".mtl"
+
+    write_mtl(mtl, atlas)
+
+    return f"mtllib {os.path.basename(mtl)}\nusemtl atlas\n{uvs}", first
+
+
+def dump_to_obj_textured(path: str, world, palette: dict, cache_dir: str = ".cache") -> None:
+    """Writes the world to an obj file using the atlas, with its mtl file next to it."""
+
+    from .meshing import MeshCache, dump_to_obj_cached
+
+    header, first = textured_header(path, palette, cache_dir)
+
+    with open(path, "w") as f:
+        f.write(header)
+        dump_to_obj_cached(f, world, MeshCache(palette, first))
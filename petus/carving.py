@@ -0,0 +1,80 @@
+from multiprocessing import Lock, Pool
+from .world import World
+import numpy
+
+# Carving spread over worker processes. The world lives in shared memory (or in a memory mapped
+# file, which every worker maps again) and each worker carves its own batch of spheres straight
+# into it. Spheres that touch the same chunks are serialised with a
+# lock per chunk (chunks share LOCK_STRIPES locks between them). Carving only ever turns stone into
+# air, so the result doesn't depend on which worker gets to a block first and stays deterministic.
+
+LOCK_STRIPES = 64
+
+worker_world = None
+worker_locks = None
+
+
+def init_worker(shm_name: str, path: str, bounds: tuple, locks: list) -> None:
+    global worker_world, worker_locks
+
+    if path is not None:
+        worker_world = World(*bounds, path, mode="r+")
+    else:
+        worker_world = World(*bounds, shared=shm_name)
+    worker_locks = locks
+
+
+def carve_batch(batch: tuple) -> None:
+    centres, radius = batch
+
+    for y, z, x in centres.tolist():
+        # every chunk the sphere's bounding box touches, locked in a fixed order so workers can't deadlock
+        stripes = sorted(
+            {
+                hash((cx, cz)) % LOCK_STRIPES
+                for cx in range((x - radius) // 16, (x + radius - 1) // 16 + 1)
+                for cz in range((z - radius) // 16, (z + radius - 1) // 16 + 1)
+            }
+        )
+
+        for stripe in stripes:
+            worker_locks[stripe].acquire()
+
+        try:
+            worker_world.remove_sphere(y, z, x, radius)
+        finally:
+            for stripe in stripes:
+                worker_locks[stripe].release()
+
+
+def carve_parallel(world: World, centres: numpy.ndarray, radius: int, workers: int, pending=None) -> None:
+    """Removes a sphere at each (y, z, x) centre, like remove_sphere(), using worker processes.
+
+    The world has to be in shared memory (World(..., shared=True)) or memory mapped to a file.
+    """
+
+    if world.shm is None and world.path is None:
+        raise ValueError("parallel carving needs a world in shared memory or in a memory mapped file")
+
+    if pending is not None:  # parts of spheres outside the world are recorded here, not in the workers
+        for y, z, x in centres.tolist():
+            pending.carve_sphere(world, y, z, x, radius)
+
+    # batches of spheres from the same chunks, so workers mostly don't wait on each other
+    centres = centres[numpy.lexsort((centres[:, 1] // 16, centres[:, 2] // 16))]
+    batches = [(b, radius) for b in numpy.array_split(centres, workers * 4) if len(b)]
+
+    locks = [Lock() for _ in range(LOCK_STRIPES)]
+    bounds = (world.min_cx, world.min_cz, world.max_cx, world.max_cz)
+
+    shm_name = None if world.shm is None else world.shm.name
+
+    with Pool(workers, init_worker, (shm_name, world.path, bounds, locks)) as pool:
+        pool.map(carve_batch, batches)
+
+    # the workers' dirty sections don't make it back here
+    for y, z, x in centres.tolist():
+        box = world.sphere_box(y, z, x, radius)
+
+        if box is not None:
+            world.mark_box_dirty(*box)
@@ -1,11 +1,16 @@
-from opensimplex import OpenSimplex  # pip install opensimplex
 from time import perf_counter as pf
 from random import Random
-import numpy
 import math
-import sys
+import os
+
+# numpy and the modules that need it (world.py, noise_backends.py, carving.py) are imported where
+# they're used, so importing this module is cheap and doesn't generate anything
 
 HEIGHT_FACTOR = 72
+WORLD_VOLUME = False  # store all chunks in one contiguous array (see world.py) instead of a dict
+WORLD_MMAP = None  # file to memory map the world array to, for worlds that don't fit in ram
+NOISE_BACKEND = "scalar"  # see noise_backends.py, all of them give the same noise
+CARVE_WORKERS = 1  # processes to carve caves with, more than 1 needs WORLD_VOLUME (see carving.py)
 
 
 # here, a "chunk" refers to a 256x16x16 array of block states
@@ -30,6 +35,8 @@ palette = {**palette, **{v: k for k, v in palette.items()}}
 
 
 def blank_chunk() -> list:  # used to test dumping to a obj file
+    import numpy
+
     #                       y   z   x
     chunk = numpy.zeros((256, 16, 16), numpy.uint64)  # kinda how chunks are stored in pymine
 
@@ -45,11 +52,59 @@ def map_range(x: int, in_min: int, in_max: int, out_min: int, out_max: int) -> f
     return (x - in_min) * (out_max - out_min) / (in_max - in_min) + out_min
 
 
+def is_world(chunks) -> bool:  # a World (see world.py) rather than the chunks dict
+    return not isinstance(chunks, dict)
+
+
 def distance(y1: int, z1: int, x1: int, y2: int, z2: int, x2: int) -> float:
     return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2 + (z2 - z1) ** 2)
 
 
-def remove_sphere(chunks: dict, y: int, z: int, x: int, radius: int) -> None:
+class PendingEdits:
+    """Edits aimed at chunks that haven't been generated yet, keyed by chunk coordinate.
+
+    Edits are stored compactly (a carved sphere is one tuple, not one entry per block) and are
+    replayed with apply() once the chunk exists, so generating a world in several passes (see
+    generate_world()) doesn't leave cut-off caves at the old border. Ore veins always fit in their
+    own chunk, so only carving ends up here.
+    """
+
+    def __init__(self) -> None:
+        self.edits = {}
+
+    def __len__(self) -> int:
+        return sum(len(e) for e in self.edits.values())
+
+    def __contains__(self, key) -> bool:
+        return key in self.edits
+
+    def carve_sphere(self, chunks: dict, y: int, z: int, x: int, radius: int) -> None:
+        # record the sphere once for every chunk in its bounding box that is missing
+        for cx in range((x - radius) // 16, (x + radius - 1) // 16 + 1):
+            for cz in range((z - radius) // 16, (z + radius - 1) // 16 + 1):
+                if (cx, cz) not in chunks:
+                    self.edits.setdefault((cx, cz), []).append(("carve", y, z, x, radius))
+
+    def apply(self, chunks: dict, cx: int, cz: int) -> int:
+        edits = self.edits.pop((cx, cz), ())
+        chunk = {(cx, cz): chunks[cx, cz]}  # so carving can't spill into other chunks
+
+        for edit in edits:
+            remove_sphere(chunk, *edit[1:])
+
+        if edits and is_world(chunks):
+            chunks.mark_dirty(cx, cz)
+
+        return len(edits)
+
+
+def remove_sphere(chunks: dict, y: int, z: int, x: int, radius: int, pending: PendingEdits = None) -> None:
+    if is_world(chunks):
+        return chunks.remove_sphere(y, z, x, radius, pending)
+
+    if pending is not None:
+        pending.carve_sphere(chunks, y, z, x, radius)
+
     for y2 in range(y - radius, y + radius):
         for z2 in range(z - radius, z + radius):
             for x2 in range(x - radius, x + radius):
@@ -65,129 +120,222 @@ def remove_sphere(chunks: dict, y: int, z: int, x: int, radius: int) -> None:
     return chunks
 
 
-def noisy_chunk(noise, randomness, chunk_x: int, chunk_z: int) -> list:
-    chunk = [[[0] * 16 for _ in range(16)] for _ in range(256)]
-    height_map = [[0] * 16 for _ in range(16)]
+def fill_strata(height_map, bedrock, sea_level: int, base_bedrock=None, dirt_depth: int = 8):
+    """Paints the layers of a chunk from its height map ([z][x]) in one go, returns it as a [y][z][x] array.
 
-    x_offset = 16 * chunk_x
-    z_offset = 16 * chunk_z
+    From the bottom up a column is stone up to its height, dirt_depth blocks of dirt, then water if
+    the column is below sea_level or grass if not. bedrock is where the bedrock noise of y = 1 to 4 is
+    high enough (y = 0 is always bedrock), base_bedrock the same for y = 1 to 5 with the un-offset noise,
+    which is only left showing in columns of height 0.
+    """
+
+    import numpy
+
+    e = numpy.asarray(height_map)
+    y = numpy.arange(256)[:, None, None]
+
+    chunk = numpy.zeros((256, 16, 16), numpy.uint8)
 
-    for y in range(5):
-        for x in range(16):
-            for z in range(16):
-                n = noise.noise3d(x, y, z)
+    if base_bedrock is not None:
+        chunk[1:6][base_bedrock & (e == 0)] = palette["bedrock"]
 
-                # I do this to get more of a gradient between the different layers of bedrock
-                if y < 3 and n >= 0:
-                    chunk[y + 1][z][x] = palette["bedrock"]
-                elif n > 0:
-                    chunk[y + 1][z][x] = palette["bedrock"]
+    chunk[y < e] = palette["stone"]
+    chunk[(y >= e) & (y < e + dirt_depth) & (e > 0)] = palette["dirt"]
+
+    surface = (y == e + dirt_depth) & (e > 0)
+    chunk[surface & (e - 1 < sea_level)] = palette["water"]
+    chunk[surface & (e - 1 >= sea_level)] = palette["grass"]
+
+    chunk[0] = palette["bedrock"]
+    chunk[1:5][bedrock] = palette["bedrock"]
+
+    return chunk
+
+
+def noisy_chunk(noise, randomness, chunk_x: int, chunk_z: int, height_factor: int = HEIGHT_FACTOR) -> list:
+    import numpy
+
+    x_offset = 16 * chunk_x
+    z_offset = 16 * chunk_z
 
     frequency = 20
     octaves = [3, 7, 12]
-    height_factor = HEIGHT_FACTOR  # how high the surface is
+    # height_factor is how high the surface is
     # redistrib = 0.035 * (256 / height_factor)
     redistrib = 0.05 * (256 / height_factor)
 
     octave_inverted_sum = sum([1 / o for o in octaves])
 
-    for z in range(16):
-        for x in range(16):
-            nx = (x + x_offset) / 16 / frequency
-            nz = (z + z_offset) / 16 / frequency
+    nx = (numpy.arange(16) + x_offset) / 16 / frequency
+    nz = (numpy.arange(16) + z_offset) / 16 / frequency
 
-            # octaves
-            e = sum([(noise.noise2d(o * nx, o * nz) / o) for o in octaves])
-            e /= octave_inverted_sum
+    # octaves
+    e = sum([(noise.noise2d_grid(o * nx, o * nz) / o) for o in octaves])
+    e /= octave_inverted_sum
 
-            # account for noise2d() range (-1 to 1)
-            e += 1
-            e /= 2
+    # account for noise2d() range (-1 to 1)
+    e += 1
+    e /= 2
 
-            # redistribution
-            e **= redistrib
+    # redistribution
+    e **= redistrib
 
-            # world is 256 blocks high but fuck it
-            e *= height_factor
+    # world is 256 blocks high but fuck it
+    e *= height_factor
 
-            # block coords can't be floats
-            e = int(e)
+    # block coords can't be floats
+    height_map = e.astype(int)
 
-            for y in range(e):
-                if y < (height_factor - 14):  # draw grass or water depending on height
-                    chunk[y + 9][z][x] = palette["water"]
-                else:
-                    chunk[y + 9][z][x] = palette["grass"]
+    # the bedrock layers, I do this to get more of a gradient between the different layers of bedrock
+    n = noise.noise3d_grid(numpy.arange(16) + x_offset, numpy.arange(1, 5), numpy.arange(16) + z_offset)
+    bedrock = n > 0
+    bedrock[0] |= n[0] >= 0
 
-                for i in range(9):  # draw dirt
-                    chunk[y + i][z][x] = palette["dirt"]
+    # the first pass of bedrock (un-offset, one block up) is painted over by the terrain unless a column
+    # is 0 high, so its noise is only worth getting then
+    base_bedrock = None
 
-                chunk[y][z][x] = palette["stone"]  # draw stone
+    if (height_map == 0).any():
+        n = noise.noise3d_grid(numpy.arange(16), numpy.arange(5), numpy.arange(16))
+        base_bedrock = n > 0
+        base_bedrock[:3] |= n[:3] >= 0
 
-    # generate the bedrock layers
-    for y in range(5):
-        for z in range(16):
-            for x in range(16):
-                if y == 0:
-                    chunk[y][z][x] = palette["bedrock"]
-                else:
-                    n = noise.noise3d(x + x_offset, y, z + z_offset)
+    chunk = fill_strata(height_map, bedrock, height_factor - 14, base_bedrock, 8)
 
-                    # I do this to get more of a gradient between the different layers of bedrock
-                    if y < 2 and n >= 0:
-                        chunk[y][z][x] = palette["bedrock"]
-                    elif n > 0:
-                        chunk[y][z][x] = palette["bedrock"]
+    return chunk.tolist()
 
-    return chunk
 
+def worm_paths(noise, worms: list, segments: int, segment_len: int):
+    """Where every worm carves, as an array of (y, z, x) sphere centres.
+
+    All worms are stepped together, with one batch of noise per segment for the whole population.
+    """
+
+    import numpy
+
+    x, y, z = numpy.array(worms, float).reshape(-1, 3).T
+    centres = []
+
+    for s in range(segments):
+        noise_a = noise.noise3d_points(x, y, z)
+        noise_b = noise.noise3d_points(x * x, y * y, z * z)
+
+        pitch = map_range(noise_a, -1, 1, -math.pi, math.pi)
+        yaw = map_range(noise_b, -1, 1, -math.pi, math.pi)
+
+        cos_pitch = numpy.cos(pitch)
+
+        yi = numpy.sin(yaw) * cos_pitch
+        zi = numpy.sin(pitch)
+        xi = numpy.cos(yaw) * cos_pitch
+
+        for p in range(segment_len):
+            centres.append(numpy.stack([y, z, x], 1).astype(int))  # truncates like int() does
+
+            y = y + yi
+            z = z + zi
+            x = x + xi
+
+    if not centres:
+        return numpy.zeros((0, 3), int)
+
+    return numpy.concatenate(centres)
+
+
+def perlin_worms(
+    chunks,
+    randomness,
+    noise,
+    pending: PendingEdits = None,
+    spawn_chunks=None,
+    workers: int = 1,
+    segments: int = None,
+    height_factor: int = HEIGHT_FACTOR,
+):
+    import numpy
 
-def perlin_worms(chunks, randomness, noise):
     segment_len = 3
-    segments = 4 * len(chunks)  # of segments need to scale with amount of chunks
+
+    if segments is None:
+        segments = 4 * len(chunks)  # of segments need to scale with amount of chunks
     worms = []
 
-    for cx, cz in chunks.keys():
-        chunk = chunks[cx, cz]
+    ys = numpy.arange(5, height_factor)  # worms spawn below the surface
 
+    # worms only spawn in spawn_chunks (all chunks by default) but can carve into any of them
+    for cx, cz in chunks.keys() if spawn_chunks is None else spawn_chunks:
         x_offset = cx * 16
         z_offset = cz * 16
 
-        for z in range(16):
-            z_zo = z + z_offset
+        n = noise.noise3d_grid(numpy.arange(16) + x_offset, ys, numpy.arange(16) + z_offset)
 
-            for x in range(16):
-                x_xo = x + x_offset
+        # z, x, y order
+        for z, x, y in numpy.argwhere(n.transpose(1, 2, 0) > 0.875).tolist():
+            worms.append((x + x_offset, y + 5, z + z_offset))
 
-                for y in range(5, HEIGHT_FACTOR):
-                    if noise.noise3d(x_xo, y, z_zo) > 0.875:
-                        worms.append((x_xo, y, z_zo))
+    # carving doesn't depend on the order spheres are removed in, so each block is only carved once
+    centres = numpy.unique(worm_paths(noise, worms, segments, segment_len), axis=0)
 
-    for x, y, z in worms:
-        for s in range(segments):
-            noise_a = noise.noise3d(x, y, z)
-            noise_b = noise.noise3d(x * x, y * y, z * z)
+    if workers > 1:
+        from .carving import carve_parallel
 
-            pitch = map_range(noise_a, -1, 1, -math.pi, math.pi)
-            yaw = map_range(noise_b, -1, 1, -math.pi, math.pi)
+        carve_parallel(chunks, centres, 4, workers, pending)
+    else:
+        for y, z, x in centres.tolist():
+            remove_sphere(chunks, y, z, x, 4, pending)
 
-            cos_pitch = math.cos(pitch)
+    return chunks, len(worms)
 
-            yi = math.sin(yaw) * cos_pitch
-            zi = math.sin(pitch)
-            xi = math.cos(yaw) * cos_pitch
 
-            for p in range(segment_len):
-                remove_sphere(chunks, int(y), int(z), int(x), 4)
+def ore_lattice(noise, cx1: int, cz1: int, ys, nx: int, nz: int, veins: list) -> dict:
+    """noise / 2 + 0.5 at every point the searches of the given veins sample, as [y][z][x] arrays.
 
-                y += yi
-                z += zi
-                x += xi
+    Vein v samples x + cx1 + v / 2 for x in range(nx) (same for z), so the veins of a chunk with even
+    v share one lattice of whole blocks, the ones with odd v another one shifted by half a block, and
+    every point is only sampled once however many veins hit it. See vein_peak() for looking them up.
+    """
 
-    return chunks, len(worms)
+    import numpy
+
+    lattice = {}
+
+    for parity in (0, 1):
+        shifts = [v // 2 for v in veins if v % 2 == parity]
+
+        if shifts:
+            xs = cx1 + parity / 2 + numpy.arange(nx + max(shifts))
+            zs = cz1 + parity / 2 + numpy.arange(nz + max(shifts))
+            lattice[parity] = noise.noise3d_grid(xs, ys, zs) / 2 + 0.5
 
+    return lattice
+
+
+def vein_peak(n, shift: int, nx: int, nz: int, y1: int):
+    """The (x, y, z, n) the search loops of a vein end up with, or None if n isn't above 0.85.
+
+    n is the vein's lattice from ore_lattice(), which its box starts shift points into. The loops only
+    take a point over a strictly higher one in y, z, x order, which is the first of the highest ones,
+    same as argmax().
+    """
+
+    import numpy
+
+    n = n[:, shift : shift + nz, shift : shift + nx]
+    y, z, x = numpy.unravel_index(n.argmax(), n.shape)
+
+    if n[y, z, x] > 0.85:
+        return (int(x), int(y) + y1, int(z), float(n[y, z, x]))
+
+    return None
+
+
+def make_ore_pockets(chunks, randomness, noise, placed: dict = None):
+    # placed counts the veins of each ore that placed at least one block, if given
+    import numpy
+
+    if placed is None:
+        placed = {}
 
-def make_ore_pockets(chunks, randomness, noise):
     d_veins = 1
     d_max_p_dim = 2
     e_veins = 0  # 11 for mountains
@@ -209,168 +357,151 @@ def make_ore_pockets(chunks, randomness, noise):
 
     pockets = []
 
+    # every vein used to search the whole of its box point by point for the highest noise, now the
+    # searches of a chunk's veins are done in one go on a shared lattice (see ore_lattice()), and the
+    # peak is only kept if it's high enough to place ore. zc is kept up to date like the search loops
+    # left it, since iron ore's search reads it instead of its own z.
+
     for cx, cz in chunks.keys():
         chunk = chunks[cx, cz]
 
         cx1 = cx * 16
         cz1 = cz * 16
 
-        for v in range(d_veins):
-            if (noise.noise2d(cx1 + v, cz1 + v) / 2 + 0.5) < 0.9:
-                # diamond ore
-                max_ = (0, 0, 0, 0)
+        veins = [v for v in range(d_veins) if (noise.noise2d(cx1 + v, cz1 + v) / 2 + 0.5) < 0.9]
+        lattice = ore_lattice(noise, cx1, cz1, numpy.arange(1, 17), 15, 15, veins)
 
-                for y in range(1, 17):
-                    for z in range(15):
-                        zc = z + cz1 + v / 2
+        for v in veins:
+            # diamond ore
+            max_ = vein_peak(lattice[v % 2], v // 2, 15, 15, 1)
+            zc = 14 + cz1 + v / 2
 
-                        for x in range(15):
-                            n = noise.noise3d(x + cx1 + v / 2, y, zc) / 2 + 0.5
+            if max_ is not None:
+                hit = False
 
-                            if n > max_[3]:
-                                max_ = (x, y, z, n)
+                for y in range(d_max_p_dim):
+                    yc = y + max_[1]
 
-                if max_[3] > 0.85:
-                    for y in range(d_max_p_dim):
-                        yc = y + max_[1]
+                    for z in range(d_max_p_dim):
+                        zc = z + max_[2]
 
-                        for z in range(d_max_p_dim):
-                            zc = z + max_[2]
+                        for x in range(d_max_p_dim):
+                            if noise.noise3d(cx1 + x, y, cz1 + z) > 0.25:
+                                chunk[yc][zc][x + max_[0]] = 6  # diamond ore
+                                hit = True
 
-                            for x in range(d_max_p_dim):
-                                if noise.noise3d(cx1 + x, y, cz1 + z) > 0.25:
-                                    chunk[yc][zc][x + max_[0]] = 6  # diamond ore
+                if hit:
+                    placed["diamond_ore"] = placed.get("diamond_ore", 0) + 1
 
-        for v in range(e_veins):
-            if (noise.noise2d(cx1 + v / 2, cz1 + v / 2) / 2 + 0.5) < 0.9:
-                # emerald ore
-                max_ = (0, 0, 0, 0)
+        veins = [v for v in range(e_veins) if (noise.noise2d(cx1 + v / 2, cz1 + v / 2) / 2 + 0.5) < 0.9]
+        lattice = ore_lattice(noise, cx1, cz1, numpy.arange(1, 32) + 16 * 1, 16, 16, veins)
 
-                for y in range(1, 32):
-                    yc = y + 16 * 1
+        for v in veins:
+            # emerald ore
+            max_ = vein_peak(lattice[v % 2], v // 2, 16, 16, 1)
+            zc = 15 + cz1 + v / 2
 
-                    for z in range(16):
-                        zc = z + cz1 + v / 2
+            if max_ is not None:
+                hit = False
 
-                        for x in range(16):
-                            n = noise.noise3d(x + cx1 + v / 2, yc, zc) / 2 + 0.5
+                for y in range(l_max_p_dim):
+                    yc = y + 16 * 1 + max_[1]
 
-                            if n > max_[3]:
-                                max_ = (x, y, z, n)
+                    for z in range(l_max_p_dim):
+                        zc = cz + z + max_[2]
 
-                if max_[3] > 0.85:
-                    for y in range(l_max_p_dim):
-                        yc = y + 16 * 1 + max_[1]
+                        for x in range(l_max_p_dim):
+                            if noise.noise3d(cx + x + max_[0], yc, zc) > 0.25:
+                                chunk[y + max_[1]][z + max_[2]][x + max_[0]] = 11
+                                hit = True
 
-                        for z in range(l_max_p_dim):
-                            zc = cz + z + max_[2]
+                if hit:
+                    placed["emerald_ore"] = placed.get("emerald_ore", 0) + 1
 
-                            for x in range(l_max_p_dim):
-                                if noise.noise3d(cx + x + max_[0], yc, zc) > 0.25:
-                                    chunk[y + max_[1]][z + max_[2]][x + max_[0]] = 11
+        veins = [v for v in range(g_veins) if (noise.noise2d(cx1 + v / 2, cz1 + v / 2) / 2 + 0.5) < 0.9]
+        lattice = ore_lattice(noise, cx1, cz1, numpy.arange(2, 28) + 16 * 2, 15, 15, veins)
 
-        for v in range(g_veins):
-            if (noise.noise2d(cx1 + v / 2, cz1 + v / 2) / 2 + 0.5) < 0.9:
-                # gold ore
-                max_ = (0, 0, 0, 0)
+        for v in veins:
+            # gold ore
+            max_ = vein_peak(lattice[v % 2], v // 2, 15, 15, 2)
+            zc = 14 + cz1 + v / 2
 
-                for y in range(2, 28):
-                    yc = y + 16 * 2
+            if max_ is not None:
+                hit = False
 
-                    for z in range(15):
-                        zc = z + cz1 + v / 2
+                for y in range(g_max_p_dim):
+                    yc = y + 16 * 2 + max_[1]
 
-                        for x in range(15):
-                            n = noise.noise3d(x + cx1 + v / 2, yc, zc) / 2 + 0.5
+                    for z in range(g_max_p_dim):
+                        zc = cz + z + max_[2]
 
-                            if n > max_[3]:
-                                max_ = (x, y, z, n)
+                        for x in range(g_max_p_dim):
+                            if noise.noise3d(cx + x + max_[0], yc, zc) > 0.25:
+                                chunk[y + max_[1]][z + max_[2]][x + max_[0]] = 9
+                                hit = True
 
-                if max_[3] > 0.85:
-                    for y in range(g_max_p_dim):
-                        yc = y + 16 * 2 + max_[1]
+                if hit:
+                    placed["gold_ore"] = placed.get("gold_ore", 0) + 1
 
-                        for z in range(g_max_p_dim):
-                            zc = cz + z + max_[2]
+        veins = [v for v in range(l_veins) if (noise.noise2d(cx1 + v / 2, cz1 + v / 2) / 2 + 0.5) < 0.9]
+        lattice = ore_lattice(noise, cx1, cz1, numpy.arange(1, 30) + 16 * 3, 15, 15, veins)
 
-                            for x in range(g_max_p_dim):
-                                if noise.noise3d(cx + x + max_[0], yc, zc) > 0.25:
-                                    chunk[y + max_[1]][z + max_[2]][x + max_[0]] = 9
+        for v in veins:
+            # lapis ore
+            max_ = vein_peak(lattice[v % 2], v // 2, 15, 15, 1)
+            zc = 14 + cz1 + v / 2
 
-        for v in range(l_veins):
-            if (noise.noise2d(cx1 + v / 2, cz1 + v / 2) / 2 + 0.5) < 0.9:
-                # lapis ore
-                max_ = (0, 0, 0, 0)
+            if max_ is not None:
+                hit = False
 
-                for y in range(1, 30):
-                    yc = y + 16 * 3
+                for y in range(l_max_p_dim):
+                    yc = y + 16 * 3 + max_[1]
 
-                    for z in range(15):
-                        zc = z + cz1 + v / 2
+                    for z in range(l_max_p_dim):
+                        zc = cz + z + max_[2]
 
-                        for x in range(15):
-                            n = noise.noise3d(x + cx1 + v / 2, yc, zc) / 2 + 0.5
+                        for x in range(l_max_p_dim):
+                            if noise.noise3d(cx + x + max_[0], yc, zc) > 0.25:
+                                chunk[y + max_[1]][z + max_[2]][x + max_[0]] = 11
+                                hit = True
 
-                            if n > max_[3]:
-                                max_ = (x, y, z, n)
+                if hit:
+                    placed["lapis_ore"] = placed.get("lapis_ore", 0) + 1
 
-                if max_[3] > 0.85:
-                    for y in range(l_max_p_dim):
-                        yc = y + 16 * 3 + max_[1]
+        veins = [v for v in range(r_veins) if (noise.noise2d(cx1 + v / 2, cz1 + v / 2) / 2 + 0.5) < 0.9]
+        lattice = ore_lattice(noise, cx1, cz1, numpy.arange(1, 15) + 16 * 4, 15, 15, veins)
 
-                        for z in range(l_max_p_dim):
-                            zc = cz + z + max_[2]
+        for v in veins:
+            # redstone ore
+            max_ = vein_peak(lattice[v % 2], v // 2, 15, 15, 1)
+            zc = 14 + cz1 + v / 2
 
-                            for x in range(l_max_p_dim):
-                                if noise.noise3d(cx + x + max_[0], yc, zc) > 0.25:
-                                    chunk[y + max_[1]][z + max_[2]][x + max_[0]] = 11
-
-        for v in range(r_veins):
-            if (noise.noise2d(cx1 + v / 2, cz1 + v / 2) / 2 + 0.5) < 0.9:
-                # redstone ore
-                max_ = (0, 0, 0, 0)
+            if max_ is not None:
+                hit = False
 
-                for y in range(1, 15):
-                    yc = y + 16 * 4
+                for y in range(r_max_p_dim):
+                    yc = y + 16 * 4 + max_[1]
 
-                    for z in range(15):
-                        zc = z + cz1 + v / 2
+                    for z in range(r_max_p_dim):
+                        zc = cz + z + max_[2]
 
-                        for x in range(15):
-                            n = noise.noise3d(x + cx1 + v / 2, yc, zc) / 2 + 0.5
+                        for x in range(r_max_p_dim):
+                            if noise.noise3d(cx + x + max_[0], yc, zc) > 0.25:
+                                chunk[y + max_[1]][z + max_[2]][x + max_[0]] = 10
+                                hit = True
 
-                            if n > max_[3]:
-                                max_ = (x, y, z, n)
-
-                if max_[3] > 0.85:
-                    for y in range(r_max_p_dim):
-                        yc = y + 16 * 4 + max_[1]
-
-                        for z in range(r_max_p_dim):
-                            zc = cz + z + max_[2]
-
-                            for x in range(r_max_p_dim):
-                                if noise.noise3d(cx + x + max_[0], yc, zc) > 0.25:
-                                    chunk[y + max_[1]][z + max_[2]][x + max_[0]] = 10
+                if hit:
+                    placed["redstone_ore"] = placed.get("redstone_ore", 0) + 1
 
         for v in range(i_veins):
             if (noise.noise2d(cx1 + v / 2, cz1 + v / 2) / 2 + 0.5) < 0.9:
-                # iron ore
-                max_ = (0, 0, 0, 0)
+                # iron ore, its search samples the same zc for every z so only z = 0 can be the peak
+                n = noise.noise3d_grid(cx1 + v / 2 + numpy.arange(14), numpy.arange(1, 63) + 16 * 5, [zc]) / 2 + 0.5
+                max_ = vein_peak(n, 0, 14, 1, 1)
 
-                for y in range(1, 63):
-                    yc = y + 16 * 5
+                if max_ is not None:
+                    hit = False
 
-                    for z in range(14):
-                        z + cz1 + v / 2
-
-                        for x in range(14):
-                            n = noise.noise3d(x + cx1 + v / 2, yc, zc) / 2 + 0.5
-
-                            if n > max_[3]:
-                                max_ = (x, y, z, n)
-
-                if max_[3] > 0.85:
                     for y in range(i_max_p_dim[0]):
                         yc = y + 16 * 5 + max_[1]
 
@@ -380,39 +511,61 @@ def make_ore_pockets(chunks, randomness, noise):
                             for x in range(i_max_p_dim[2]):
                                 if noise.noise3d(cx + x + max_[0], yc, zc) > 0.25:
                                     chunk[y + max_[1]][z + max_[2]][x + max_[0]] = 8
+                                    hit = True
 
-        for v in range(c_veins):
-            if (noise.noise2d(cx1 + v / 2, cz1 + v / 2) / 2 + 0.5) < 0.9:
-                # iron ore
-                max_ = (0, 0, 0, 0)
+                    if hit:
+                        placed["iron_ore"] = placed.get("iron_ore", 0) + 1
 
-                for y in range(1, 128):
-                    yc = y + 16 * 6
+        veins = [v for v in range(c_veins) if (noise.noise2d(cx1 + v / 2, cz1 + v / 2) / 2 + 0.5) < 0.9]
+        lattice = ore_lattice(noise, cx1, cz1, numpy.arange(1, 128) + 16 * 6, 14, 14, veins)
 
-                    for z in range(14):
-                        zc = z + cz1 + v / 2
+        for v in veins:
+            # iron ore
+            max_ = vein_peak(lattice[v % 2], v // 2, 14, 14, 1)
+            zc = 13 + cz1 + v / 2
 
-                        for x in range(14):
-                            n = noise.noise3d(x + cx1 + v / 2, yc, zc) / 2 + 0.5
+            if max_ is not None:
+                hit = False
 
-                            if n > max_[3]:
-                                max_ = (x, y, z, n)
+                for y in range(c_max_p_dim[0]):
+                    yc = y + 16 * 6 + max_[1]
 
-                if max_[3] > 0.85:
-                    for y in range(c_max_p_dim[0]):
-                        yc = y + 16 * 6 + max_[1]
+                    for z in range(c_max_p_dim[1]):
+                        zc = cz + z + max_[2]
 
-                        for z in range(c_max_p_dim[1]):
-                            zc = cz + z + max_[2]
+                        for x in range(c_max_p_dim[2]):
+                            if noise.noise3d(cx + x + max_[0], yc, zc) > 0.25:
+                                chunk[y + max_[1]][z + max_[2]][x + max_[0]] = 7
+                                hit = True
 
-                            for x in range(c_max_p_dim[2]):
-                                if noise.noise3d(cx + x + max_[0], yc, zc) > 0.25:
-                                    chunk[y + max_[1]][z + max_[2]][x + max_[0]] = 7
+                if hit:
+                    placed["coal_ore"] = placed.get("coal_ore", 0) + 1
+
+        if is_world(chunks):  # ores are written straight into the chunk's view
+            chunks.mark_dirty(cx, cz)
 
     return chunks
 
 
-def dump_to_obj(file, chunks: dict) -> None:
+def block_visible(chunk: list, y: int, z: int, x: int) -> bool:
+    if z == 0 or x == 0:
+        return True
+
+    for y2 in (y - 1, y + 1):
+        for z2 in (z - 1, z + 1):
+            for x2 in (x - 1, x + 1):
+                try:
+                    if chunk[y2][z2][x2] == 0:
+                        return True
+                except IndexError:
+                    return True
+
+    return False
+
+
+def dump_to_obj(file, chunks: dict) -> int:
+    import numpy
+
     points = {}
     rpoints = {}
     faces = {}
@@ -428,29 +581,32 @@ def dump_to_obj(file, chunks: dict) -> None:
             faces[len(faces) - 1] = f
             rfaces[f] = len(faces) - 1
 
+    # in world volume mode, which blocks are visible is worked out for the whole world up front
+    visible = chunks.visible() if is_world(chunks) else None
+
     for cx, cz in chunks.keys():
         chunk = chunks[cx, cz]
 
         cxo = cx * 16
         czo = cz * 16
 
-        for y in range(256):
-            for z in range(16):
-                for x in range(16):
-                    if chunk[y][z][x] == 0:  # air
-                        continue
+        if visible is None:
+            solid = [(y, z, x) for y in range(256) for z in range(16) for x in range(16) if chunk[y][z][x] != 0]
+        else:
+            solid = numpy.argwhere(chunk).tolist()  # same y, z, x order as the loops above
 
-                    tx = x + cxo
-                    tz = z + czo
+        for y, z, x in solid:
+            tx = x + cxo
+            tz = z + czo
 
-                    append_point(tx, y, tz)
-                    append_point(tx + 1, y, tz)
-                    append_point(tx, y + 1, tz)
-                    append_point(tx, y, tz + 1)
-                    append_point(tx + 1, y + 1, tz)
-                    append_point(tx, y + 1, tz + 1)
-                    append_point(tx + 1, y, tz + 1)
-                    append_point(tx + 1, y + 1, tz + 1)
+            append_point(tx, y, tz)
+            append_point(tx + 1, y, tz)
+            append_point(tx, y + 1, tz)
+            append_point(tx, y, tz + 1)
+            append_point(tx + 1, y + 1, tz)
+            append_point(tx, y + 1, tz + 1)
+            append_point(tx + 1, y, tz + 1)
+            append_point(tx + 1, y + 1, tz + 1)
 
         # maxes = {}
         #
@@ -460,86 +616,366 @@ def dump_to_obj(file, chunks: dict) -> None:
         #             if chunk[y][z][x] != 0 and y > maxes.get((z, x), -1):
         #                 maxes[z, x] = y
 
-        for y in range(256):
-            for z in range(16):
-                for x in range(16):
-                    block = chunk[y][z][x]
+        if visible is None:
+            drawn = [(y, z, x, chunk[y][z][x]) for y, z, x in solid if block_visible(chunk, y, z, x)]
+        else:
+            drawn = [(y, z, x, int(chunk[y, z, x])) for y, z, x in numpy.argwhere(visible[chunks.chunk_slice(cx, cz)]).tolist()]
+
+        for y, z, x, block in drawn:
+            block = palette[block]
+
+            tx = x + cxo
+            tz = z + czo
+
+            i1 = rpoints[(tx, y, tz)] + 1
+            i2 = rpoints[(tx + 1, y, tz)] + 1
+            i3 = rpoints[(tx, y + 1, tz)] + 1
+            i4 = rpoints[(tx, y, tz + 1)] + 1
+            i5 = rpoints[(tx + 1, y + 1, tz)] + 1
+            i6 = rpoints[(tx, y + 1, tz + 1)] + 1
+            i7 = rpoints[(tx + 1, y, tz + 1)] + 1
+            i8 = rpoints[(tx + 1, y + 1, tz + 1)] + 1
+
+            append_face(f"usemtl {block}\nf {i1} {i2} {i7} {i4}")
+            append_face(f"f {i1} {i2} {i5} {i3}")
+            append_face(f"f {i4} {i7} {i8} {i6}")
+            append_face(f"f {i1} {i4} {i6} {i3}")
+            append_face(f"f {i2} {i5} {i8} {i7}")
+            append_face(f"f {i3} {i5} {i8} {i6}")
 
-                    if chunk[y][z][x] == 0:  # air
-                        continue
+    file.write("\n".join([f"v {p[0]} {p[1]} {p[2]}" for p in points.values()]) + "\n" + "\n".join(faces.values()) + "\n")
 
-                    visible = False
-
-                    if z == 0 or x == 0:
-                        visible = True
-                    else:
-                        for y2 in (y - 1, y + 1):
-                            for z2 in (z - 1, z + 1):
-                                for x2 in (x - 1, x + 1):
-                                    try:
-                                        if chunk[y2][z2][x2] == 0:
-                                            visible = True
-                                            break
-                                    except IndexError:
-                                        visible = True
-                                        break
-
-                    if not visible:
-                        continue
+    return len(faces)
 
-                    block = palette[block]
 
-                    tx = x + cxo
-                    tz = z + czo
+def load_terrain(cache_dir: str, seed: int, height_factor: int, cx: int, cz: int):
+    # terrain only depends on the seed, the chunk and the height factor, so it's cached per those
+    import numpy
 
-                    i1 = rpoints[(tx, y, tz)] + 1
-                    i2 = rpoints[(tx + 1, y, tz)] + 1
-                    i3 = rpoints[(tx, y + 1, tz)] + 1
-                    i4 = rpoints[(tx, y, tz + 1)] + 1
-                    i5 = rpoints[(tx + 1, y + 1, tz)] + 1
-                    i6 = rpoints[(tx, y + 1, tz + 1)] + 1
-                    i7 = rpoints[(tx + 1, y, tz + 1)] + 1
-                    i8 = rpoints[(tx + 1, y + 1, tz + 1)] + 1
+    path = os.path.join(cache_dir, f"terrain-{seed}-{height_factor}", f"{cx}.{cz}.npy")
 
-                    append_face(f"usemtl {block}\nf {i1} {i2} {i7} {i4}")
-                    append_face(f"f {i1} {i2} {i5} {i3}")
-                    append_face(f"f {i4} {i7} {i8} {i6}")
-                    append_face(f"f {i1} {i4} {i6} {i3}")
-                    append_face(f"f {i2} {i5} {i8} {i7}")
-                    append_face(f"f {i3} {i5} {i8} {i6}")
+    if os.path.exists(path):
+        return numpy.load(path)
 
-    file.write("\n".join([f"v {p[0]} {p[1]} {p[2]}" for p in points.values()]) + "\n" + "\n".join(faces.values()) + "\n")
+    return None
+
+
+def save_terrain(cache_dir: str, seed: int, height_factor: int, cx: int, cz: int, chunk) -> None:
+    import numpy
+
+    path = os.path.join(cache_dir, f"terrain-{seed}-{height_factor}")
+    os.makedirs(path, exist_ok=True)
+
+    numpy.save(os.path.join(path, f"{cx}.{cz}.npy"), numpy.array(chunk, numpy.uint8))
+
+
+def generate_world(
+    seed: int,
+    radius: int,
+    stages=("terrain", "ores", "caves"),
+    noise_backend: str = NOISE_BACKEND,
+    world_volume: bool = WORLD_VOLUME,
+    mmap: str = WORLD_MMAP,
+    workers: int = CARVE_WORKERS,
+    cache_dir: str = None,
+    on_stage=None,
+    memory=None,
+    worm_segments: int = None,
+    stats: dict = None,
+    chunks=None,
+    pending: PendingEdits = None,
+    height_factor: int = HEIGHT_FACTOR,
+):
+    """Generates the chunks from -radius to radius on both axes, returns the chunks and the pending edits.
+
+    The chunks are a World (see world.py) if world_volume is set, which workers > 1 needs, otherwise a
+    dict. Terrain is always generated, ores and caves only if they're in stages. on_stage(stage, chunks)
+    is called after each stage that runs (see snapshots.py). memory is a MemoryProfile (see memory.py)
+    to record the memory each stage uses in. worm_segments fixes how far worms go, see streaming.py.
+    stats gets the number of worms and of ore veins placed of each ore (see sweep.py). height_factor
+    is how high the surface is.
+
+    chunks and pending from an earlier call with the same seed grow that world instead of starting a
+    new one: only the chunks it doesn't have yet are generated, ores are only added and worms only
+    spawned in those, and the carving the earlier worms left pending for them is applied. That gives
+    the same world as generating it in one go as long as worm_segments is set, since otherwise how far
+    worms go depends on how many chunks there are. Only a dict of chunks can grow, a World can't.
+    """
+
+    from contextlib import nullcontext
+    from .noise_backends import make_noise
 
+    measure = (lambda stage: nullcontext({})) if memory is None else memory.stage
 
-with open("test.obj", "w+") as f:
-    seed = 1281134870109837483
     randomness = Random(seed)
-    noise = OpenSimplex(seed=seed)
-    chunks = {}
+    noise = make_noise(seed, noise_backend)
+
+    if pending is None:
+        pending = PendingEdits()  # carving that reaches past the edge of the generated area
+
+    with measure("terrain") as record:
+        new = [(x, z) for x in range(-radius, radius) for z in range(-radius, radius)]
+
+        if chunks is None:
+            if world_volume:
+                from .world import World
+
+                chunks = World(-radius, -radius, radius, radius, mmap, workers > 1)
+            else:
+                chunks = {}
+        elif is_world(chunks):
+            raise ValueError("a World can't grow, generate the first pass into a dict")
+        else:
+            new = [key for key in new if key not in chunks]
+
+        print(f"Generating {len(new)} chunks...")
+        start = pf()
+
+        for x, z in new:
+            chunk = None if cache_dir is None else load_terrain(cache_dir, seed, height_factor, x, z)
+
+            if chunk is None:
+                chunk = noisy_chunk(noise, randomness, x, z, height_factor)
+
+                if cache_dir is not None:
+                    save_terrain(cache_dir, seed, height_factor, x, z, chunk)
+            elif not is_world(chunks):
+                chunk = chunk.tolist()
+
+            chunks[x, z] = chunk
+
+        print(f"Done generating chunks. ({(pf() - start):02.02f} seconds for {len(new)} chunks)")
+        record["units"] = (len(new), "chunk")
+
+    # the chunks that were just generated, the whole world unless it's being grown
+    added = chunks if len(new) == len(chunks) else {key: chunks[key] for key in new}
+
+    if on_stage is not None:
+        on_stage("terrain", chunks)
+
+    if "ores" in stages:
+        with measure("ores"):
+            print("Adding ore pockets...")
+            start = pf()
+            make_ore_pockets(added, randomness, noise, None if stats is None else stats.setdefault("veins", {}))
+            print(f"Ore pockets made! ({(pf()-start):02.02f} seconds)")
+
+        if on_stage is not None:
+            on_stage("ores", chunks)
+
+    if "caves" in stages:
+        with measure("caves"):
+            print("Generating + carving perlin worms...")
+            start = pf()
+
+            # carving the worms of an earlier pass left for the new chunks, after their ores like the
+            # rest of the world got it
+            for key in new:
+                if key in pending:
+                    pending.apply(chunks, *key)
+
+            chunks, n = perlin_worms(
+                chunks, randomness, noise, pending, new, workers if is_world(chunks) else 1, worm_segments, height_factor
+            )
+            print(f"Perlin worms finished. ({(pf() - start):02.02f} seconds for {n} worms)")
+
+            if stats is not None:
+                stats["worms"] = n
+            print(f"{len(pending)} edits pending for {len(pending.edits)} ungenerated chunks")
+
+        if on_stage is not None:
+            on_stage("caves", chunks)
+
+    return chunks, pending
+
+
+def world_array(chunks):
+    """The chunks as one (256, Z, X) uint8 array, laid out like World.blocks."""
+
+    import numpy
+
+    if is_world(chunks):
+        return numpy.asarray(chunks.blocks)
+
+    cxs = [cx for cx, cz in chunks.keys()]
+    czs = [cz for cx, cz in chunks.keys()]
+    min_cx, min_cz = min(cxs), min(czs)
+
+    blocks = numpy.zeros((256, (max(czs) - min_cz + 1) * 16, (max(cxs) - min_cx + 1) * 16), numpy.uint8)
+
+    for cx, cz in chunks.keys():
+        z = (cz - min_cz) * 16
+        x = (cx - min_cx) * 16
+        blocks[:, z : z + 16, x : x + 16] = chunks[cx, cz]
+
+    return blocks
+
+
+def stream(args, memory=None) -> None:
+    from contextlib import nullcontext
+    from .streaming import SEGMENTS, stream_world
+
+    if args.format not in ("obj", "textured"):
+        raise SystemExit("streaming only writes obj files")
+
+    if args.world_volume or args.mmap is not None:
+        raise SystemExit("streaming keeps its own window of rows, it can't use --world-volume or --mmap")
+
+    rows = []
+    north = None  # the tops of the last row of the preview, for the relief of the next one
+    on_row = None
+
+    if args.preview:
+        from .preview import colour_table, column_tops, render, save_png
+
+        colours = colour_table(palette, args.preview_colours)
+        overlays = args.preview_overlays.split(",")
+        scale = args.preview_scale
+
+        def on_row(cz, blocks) -> None:
+            nonlocal north
+
+            z0 = (cz + args.radius) * 16
+            rows.append(render(blocks, colours, True, overlays, scale, z0, north))
+
+            taken = range(-z0 % scale, blocks.shape[1], scale)
+
+            if taken:
+                north = column_tops(blocks[:, taken[-1] : taken[-1] + 1, ::scale])[0]
+
+    with open(args.output, "w") as f, nullcontext({}) if memory is None else memory.stage("stream") as record:
+        uvs = None
+
+        if args.format == "textured":
+            from .atlas import textured_header
+
+            header, uvs = textured_header(args.output, palette, args.cache_dir or ".cache")
+            f.write(header)
+
+        dropped = stream_world(
+            f,
+            args.seed,
+            args.radius,
+            args.stages.split(","),
+            args.noise_backend,
+            args.worm_segments or SEGMENTS,
+            args.workers,
+            uvs,
+            on_row,
+            args.cache_dir,
+        )
+
+        record["units"] = ((args.radius * 2) ** 2, "chunk")
+
+    print(f"{dropped} edits went past the edge of the world")
+
+    if args.preview:
+        import numpy
+
+        save_png(args.preview, numpy.concatenate(rows))
+
+    if memory is not None:
+        print(memory.report())
+
+
+def main(argv: list = None) -> None:
+    from contextlib import nullcontext
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="petus", description="Generates a world and exports it.")
+    parser.add_argument("radius", type=int, nargs="?", default=1, help="chunks from the origin on each axis")
+    parser.add_argument("--seed", type=int, default=1281134870109837483)
+    parser.add_argument("--stages", default="terrain,ores,caves", help="comma separated, terrain is always generated")
+    parser.add_argument("--workers", type=int, default=CARVE_WORKERS, help="processes to carve caves with")
+    parser.add_argument("--cache-dir", help="directory to cache generated terrain and the texture atlas in")
+    parser.add_argument("--output", default="test.obj")
+    parser.add_argument("--format", choices=("obj", "textured", "npy", "none"), default="obj", help="textured is obj with a texture atlas")
+    parser.add_argument("--noise-backend", default=NOISE_BACKEND, help="scalar, array or permtable")
+    parser.add_argument("--world-volume", action="store_true", default=WORLD_VOLUME)
+    parser.add_argument("--mmap", default=WORLD_MMAP, help="file to memory map the world volume to")
+    parser.add_argument("--stream", action="store_true", help="generate and write a few rows of chunks at a time")
+    parser.add_argument("--worm-segments", type=int, help="fixed worm length, 25 by default when streaming")
+    parser.add_argument("--preview", help="png file to render a top-down preview of the world to")
+    parser.add_argument("--preview-scale", type=int, default=1, help="blocks per preview pixel along each side")
+    parser.add_argument("--preview-colours", choices=("mtl", "sprites"), default="mtl")
+    parser.add_argument("--preview-overlays", default="", help="comma separated, caves and/or ores")
+    parser.add_argument("--memory", action="store_true", help="report the rss before and after every stage")
+    parser.add_argument("--tracemalloc", action="store_true", help="and trace python's allocations in each (a lot slower)")
+    parser.add_argument("--memory-top", type=int, default=0, help="and the N lines that allocated the most in each, traces too")
+    args = parser.parse_args(argv)
+
+    memory = None
+
+    if args.memory or args.tracemalloc or args.memory_top:
+        from .memory import MemoryProfile
+
+        memory = MemoryProfile(args.memory_top, args.tracemalloc)
+
+    if args.stream:
+        return stream(args, memory)
+
+    world_volume = args.world_volume or args.workers > 1 or args.mmap is not None or args.format == "textured"
+
+    chunks, pending = generate_world(
+        args.seed,
+        args.radius,
+        args.stages.split(","),
+        args.noise_backend,
+        world_volume,
+        args.mmap,
+        args.workers,
+        args.cache_dir,
+        memory=memory,
+        worm_segments=args.worm_segments,
+    )
+
+    with nullcontext({}) if memory is None else memory.stage("export") as record:
+        if args.format == "obj":
+            print("Dumping to obj file...")
+            start = pf()
+
+            with open(args.output, "w+") as f:
+                record["units"] = (dump_to_obj(f, chunks), "face")
+
+            print(f"Done dumping. ({(pf() - start):02.02f} seconds for {len(chunks)} chunks)")
+        elif args.format == "textured":
+            from .atlas import dump_to_obj_textured
+
+            print("Dumping to textured obj file...")
+            start = pf()
+
+            dump_to_obj_textured(args.output, chunks, palette, args.cache_dir or ".cache")
+
+            print(f"Done dumping. ({(pf() - start):02.02f} seconds for {len(chunks)} chunks)")
+        elif args.format == "npy":
+            import numpy
+
+            numpy.save(args.output, world_array(chunks))
+
+    if args.preview:
+        from .preview import colour_table, render, save_png
+
+        print("Rendering preview...")
+        start = pf()
 
-    radius = 1 if len(sys.argv) < 2 else int(sys.argv[1])
+        colours = colour_table(palette, args.preview_colours)
+        image = render(world_array(chunks), colours, True, args.preview_overlays.split(","), args.preview_scale)
+        save_png(args.preview, image)
 
-    print(f"Generating {(radius*2)**2} chunks...")
-    start = pf()
+        print(f"Done rendering. ({(pf() - start):02.02f} seconds)")
 
-    for x in range(-radius, radius):
-        for z in range(-radius, radius):
-            chunks[x, z] = noisy_chunk(noise, randomness, x, z)
+    if memory is not None:
+        print(memory.report())
 
-    print(f"Done generating chunks. ({(pf() - start):02.02f} seconds for {len(chunks)} chunks)")
+    if world_volume:
+        chunks.close()
 
-    print("Adding ore pockets...")
-    start = pf()
-    chunks = make_ore_pockets(chunks, randomness, noise)
-    print(f"Ore pockets made! ({(pf()-start):02.02f} seconds)")
 
-    print("Generating + carving perlin worms...")
-    start = pf()
-    chunks, n = perlin_worms(chunks, randomness, noise)
-    print(f"Perlin worms finished. ({(pf() - start):02.02f} seconds for {n} worms)")
+if __name__ == "__main__":
+    if not __package__:  # run as python petus/main.py, the imports in the functions are relative to the package
+        import sys
 
-    print("Dumping to obj file...")
-    start = pf()
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        __package__ = "petus"
 
-    dump_to_obj(f, chunks)
-    print(f"Done dumping. ({(pf() - start):02.02f} seconds for {len(chunks)} chunks)")
+    main()
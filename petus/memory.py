@@ -0,0 +1,126 @@
+from contextlib import contextmanager
+import os
+import sys
+import tracemalloc
+
+# Opt-in memory accounting for the pipeline (python -m petus --memory). Every stage records the
+# process's rss before and after it and the highest it has been so far, so you can tell which stage
+# blows up at large radii and what a chunk or a face costs. That's cheap enough for big worlds.
+#
+# With --tracemalloc (or --memory-top, which needs it) python's own allocations are traced as well,
+# numpy's arrays included: how much a stage allocated and kept, the most it had allocated at once,
+# and which lines allocated the most. Tracing makes the pure python stages many times slower, so
+# it's for small worlds. Shared memory and memory mapped worlds only ever show up in the rss.
+
+
+def rss() -> int:
+    """Current resident set size in bytes, or None where /proc isn't there."""
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss() -> int:
+    """Highest resident set size of the process so far in bytes, or None where it can't be read."""
+
+    try:
+        import resource
+    except ImportError:  # windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return peak if sys.platform == "darwin" else peak * 1024  # kilobytes on linux
+
+
+def size(n) -> str:
+    if n is None:
+        return "-"
+
+    for unit in ("B", "KiB", "MiB"):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+
+        n /= 1024
+
+    return f"{n:.2f} GiB"
+
+
+class MemoryProfile:
+    def __init__(self, top: int = 0, trace: bool = False) -> None:
+        self.top = top  # how many of the biggest allocators to keep for each stage, 0 for none
+        self.trace = trace or top > 0  # trace python allocations, see the top of the file
+        self.stages = []
+
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()  # only the innermost frame, deeper tracebacks make it a lot slower
+
+    @contextmanager
+    def stage(self, name: str):
+        """Records the memory used by what runs inside it. The caller can set the record's "units" to
+        (count, name), e.g. (len(chunks), "chunk"), to get the bytes per chunk."""
+
+        record = {"stage": name, "rss_before": rss(), "units": None, "retained": None, "peak": None, "top": []}
+        before = self.snapshot() if self.top else None
+
+        if self.trace:
+            tracemalloc.reset_peak()
+            start = tracemalloc.get_traced_memory()[0]
+
+        yield record
+
+        if self.trace:
+            current, peak = tracemalloc.get_traced_memory()
+
+            record["retained"] = current - start
+            record["peak"] = peak - start
+
+        record["rss_after"] = rss()
+        record["peak_rss"] = peak_rss()
+
+        if before is not None:
+            record["top"] = self.snapshot().compare_to(before, "lineno")[: self.top]
+
+        self.stages.append(record)
+
+    def snapshot(self):
+        # without tracemalloc's own allocations and the ones from importing modules
+        return tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            ]
+        )
+
+    def report(self) -> str:
+        # per unit is the traced retained / peak memory with tracing, the growth of the rss without
+        per_unit_header = "per unit (retained / peak)" if self.trace else "per unit (rss growth)"
+        lines = [
+            f"{'stage':<8} {'rss before':>11} {'rss after':>11} {'peak rss':>11} {'retained':>11} {'peak':>11}  {per_unit_header}"
+        ]
+
+        for r in self.stages:
+            per_unit = ""
+
+            if r["units"] is not None and r["units"][0]:
+                n, unit = r["units"]
+
+                if self.trace:
+                    per_unit = f"{size(r['retained'] / n)} / {size(r['peak'] / n)} per {unit} ({n} {unit}s)"
+                elif r["rss_before"] is not None and r["rss_after"] is not None:
+                    per_unit = f"{size((r['rss_after'] - r['rss_before']) / n)} per {unit} ({n} {unit}s)"
+
+            lines.append(
+                f"{r['stage']:<8} {size(r['rss_before']):>11} {size(r['rss_after']):>11} {size(r['peak_rss']):>11}"
+                f" {size(r['retained']):>11} {size(r['peak']):>11}  {per_unit}"
+            )
+
+            for stat in r["top"]:
+                frame = stat.traceback[0]
+                lines.append(f"    {size(stat.size_diff):>11} {frame.filename}:{frame.lineno}")
+
+        return "\n".join(lines)
@@ -0,0 +1,147 @@
+from .world import World, visible_blocks
+import numpy
+
+# Incremental obj export. The mesh of every 16 block high section of every chunk is kept in a cache
+# as obj text, and only sections the world marked dirty get meshed again. Faces point at vertices
+# with negative (relative) indices, so each section's text doesn't depend on what comes before it
+# and the output is just the cached sections joined together.
+#
+# Culling is the same as dump_to_obj() (see visible_blocks()), which only looks at blocks within the
+# chunk and wraps y - 1 around at the bottom of the world, so a section's faces depend on the
+# section above, the section below and, for the bottom one, the top section of the chunk. Like
+# dump_to_obj(), a block's back face (-z) is left out when the block behind it was drawn, since that
+# one already has the same face, which makes a section depend on the chunk behind it too.
+
+# corners of a block, in the same order dump_to_obj() numbers them (i1 to i8), as x, y, z offsets
+CORNERS = numpy.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 1, 0], [0, 1, 1], [1, 0, 1], [1, 1, 1]])
+
+# the 6 faces of a block, as indices into CORNERS
+FACES = numpy.array([[0, 1, 6, 3], [0, 1, 4, 2], [3, 6, 7, 5], [0, 3, 5, 2], [1, 4, 7, 6], [2, 4, 7, 5]])
+
+# obj text for a block with 5 or 6 faces
+BLOCK_FACES = {n: "usemtl %s\n" + "f %d %d %d %d\n" * n for n in (5, 6)}
+
+# and with uvs from the texture atlas (see atlas.py), where every face has its own vt index
+TEXTURED_FACES = {n: "f %d/%d %d/%d %d/%d %d/%d\n" * n for n in (5, 6)}
+
+# which corner of a tile (in the order uv_table() writes them) each corner of each face gets, so the
+# texture is upright on the sides
+FACE_UVS = numpy.array([[0, 1, 2, 3], [0, 1, 2, 3], [0, 1, 2, 3], [0, 1, 2, 3], [0, 3, 2, 1], [0, 1, 2, 3]])
+
+
+def mesh_section(chunk, visible, behind, cx: int, cz: int, section: int, palette: dict, uvs: dict = None) -> str:
+    # visible and behind are (256, 16, 16) bool arrays, whether each block is drawn and whether the
+    # block behind it is. uvs is the first vt index of every block's tile, for textured output
+    ys, zs, xs = numpy.nonzero(visible[section * 16 : section * 16 + 16])
+
+    if len(ys) == 0:
+        return ""
+
+    ys += section * 16
+    blocks = chunk[ys, zs, xs].tolist()
+    back_drawn = behind[ys, zs, xs].tolist()
+
+    # corners numbered within the section's 17x17x17 grid of corner positions, so the points each
+    # block uses can be looked up instead of searched for
+    corners = (((ys - section * 16)[:, None] + CORNERS[:, 1]) * 17 + zs[:, None] + CORNERS[:, 2]) * 17
+    corners += xs[:, None] + CORNERS[:, 0]
+
+    used = numpy.zeros(17 * 17 * 17, bool)
+    used[corners] = True
+    points = numpy.flatnonzero(used)
+
+    # point index from the end of the section's points
+    index = numpy.cumsum(used) - len(points) - 1
+    faces = index[corners][:, FACES].reshape(-1, 24)
+
+    py, pz = numpy.divmod(points, 17 * 17)
+    pz, px = numpy.divmod(pz, 17)
+    points = numpy.stack([px + cx * 16, py + section * 16, pz + cz * 16], 1)
+
+    text = ["v %d %d %d\n" % tuple(p) for p in points.tolist()]
+
+    if uvs is not None:
+        vt = numpy.array([uvs[palette[block]] for block in blocks])[:, None] + FACE_UVS.reshape(1, 24)
+        faces = numpy.stack([faces, vt], 2).reshape(-1, 48).tolist()  # vertex and vt index, in turn
+
+        for f, skip_back in zip(faces, back_drawn):
+            if skip_back:
+                text.append(TEXTURED_FACES[5] % (*f[:8], *f[16:]))
+            else:
+                text.append(TEXTURED_FACES[6] % tuple(f))
+
+        return "".join(text)
+
+    for block, f, skip_back in zip(blocks, faces.tolist(), back_drawn):
+        if skip_back:
+            text.append(BLOCK_FACES[5] % (palette[block], *f[:4], *f[8:]))
+        else:
+            text.append(BLOCK_FACES[6] % (palette[block], *f))
+
+    return "".join(text)
+
+
+def chunk_visibility(world: World, cx: int, cz: int) -> tuple:
+    """The chunk, which of its blocks are drawn and for which the block behind is drawn (see mesh_section())."""
+
+    chunk = world[cx, cz]
+    visible = visible_blocks(chunk)
+
+    behind = numpy.zeros_like(visible)
+    behind[:, 1:] = visible[:, :-1]
+
+    if (cx, cz - 1) in world:  # the back of the chunk is always drawn, if it isn't air
+        behind[:, 0] = world[cx, cz - 1][:, 15] != 0
+
+    return chunk, visible, behind
+
+
+def mesh_chunk(world: World, cx: int, cz: int, palette: dict, uvs: dict = None) -> str:
+    chunk, visible, behind = chunk_visibility(world, cx, cz)
+
+    return "".join(mesh_section(chunk, visible, behind, cx, cz, s, palette, uvs) for s in range(16))
+
+
+class MeshCache:
+    def __init__(self, palette: dict, uvs: dict = None) -> None:
+        self.palette = palette
+        self.uvs = uvs  # see mesh_section()
+        self.sections = {}  # (cx, cz, section) -> obj text
+
+    def update(self, world: World) -> int:
+        """Meshes the sections that changed since the last update, returns how many were meshed."""
+
+        dirty = world.dirty.copy()
+
+        # the sections next to a changed one can have gained or lost faces too
+        dirty[:, :, 1:] |= world.dirty[:, :, :-1]
+        dirty[:, :, :-1] |= world.dirty[:, :, 1:]
+        dirty[:, :, 0] |= world.dirty[:, :, 15]
+        dirty[1:] |= world.dirty[:-1]  # and the chunk in front of it
+
+        meshed = 0
+
+        for z, x in numpy.argwhere(dirty.any(2)).tolist():
+            cx = x + world.min_cx
+            cz = z + world.min_cz
+            chunk, visible, behind = chunk_visibility(world, cx, cz)
+
+            for section in numpy.flatnonzero(dirty[z, x]).tolist():
+                self.sections[cx, cz, section] = mesh_section(chunk, visible, behind, cx, cz, section, self.palette, self.uvs)
+                meshed += 1
+
+        world.dirty[:] = False
+
+        return meshed
+
+    def write(self, file, world: World) -> None:
+        file.write("".join(self.sections.get((cx, cz, s), "") for cx, cz in world.keys() for s in range(16)))
+
+
+def dump_to_obj_cached(file, world: World, cache: MeshCache) -> int:
+    """Like dump_to_obj(), but only re-meshes what changed since the last export with this cache."""
+
+    meshed = cache.update(world)
+    cache.write(file, world)
+
+    return meshed
@@ -0,0 +1,486 @@
+from opensimplex import OpenSimplex  # pip install opensimplex
+from time import perf_counter as pf
+import numpy
+
+# Noise backends all give the same noise as opensimplex.OpenSimplex for the same seed, and have the
+# same scalar noise2d()/noise3d() methods, plus batch versions that take arrays of points
+# (noise2d_points/noise3d_points) or the axes of a grid (noise2d_grid/noise3d_grid). Grids come out
+# in the same axis order chunks use: noise3d_grid(xs, ys, zs)[y][z][x] and noise2d_grid(xs, zs)[z][x].
+#
+# "scalar" is the reference (one OpenSimplex call per point), "array" is OpenSimplex's algorithm
+# evaluated for all points at once with numpy, and "permtable" is "array" with the permutation
+# lookups for gradients folded into precomputed tables.
+
+STRETCH_CONSTANT_2D = -0.211324865405187  # (1/Math.sqrt(2+1)-1)/2
+SQUISH_CONSTANT_2D = 0.366025403784439  # (Math.sqrt(2+1)-1)/2
+STRETCH_CONSTANT_3D = -1.0 / 6  # (1/Math.sqrt(3+1)-1)/3
+SQUISH_CONSTANT_3D = 1.0 / 3  # (Math.sqrt(3+1)-1)/3
+
+TOLERANCE = 1e-12  # largest difference from the reference a backend may have
+MIN_SPEEDUP = 2  # how many times faster than the reference the batch backends have to be
+
+NORM_CONSTANT_2D = 47
+NORM_CONSTANT_3D = 103
+
+GRADIENTS_2D = numpy.array([5, 2, 2, 5, -5, 2, -2, 5, 5, -2, 2, -5, -5, -2, -2, -5], float)
+
+GRADIENTS_3D = numpy.array(
+    [
+        [-11, 4, 4], [-4, 11, 4], [-4, 4, 11], [11, 4, 4], [4, 11, 4], [4, 4, 11],
+        [-11, -4, 4], [-4, -11, 4], [-4, -4, 11], [11, -4, 4], [4, -11, 4], [4, -4, 11],
+        [-11, 4, -4], [-4, 11, -4], [-4, 4, -11], [11, 4, -4], [4, 11, -4], [4, 4, -11],
+        [-11, -4, -4], [-4, -11, -4], [-4, -4, -11], [11, -4, -4], [4, -11, -4], [4, -4, -11],
+    ],
+    float,
+)
+
+# The lattice vertices OpenSimplex sums over depend on which part of the super-cell a point is in.
+# Here every vertex is a slot (offset from the super-cell origin, squish multiplier), and slots are
+# summed in the same order OpenSimplex adds its contributions, so the results match it exactly.
+# A slot with squish -1 contributes nothing.
+
+# 2D: contributions (1,0), (0,1), then (0,0) or (1,1), then the extra vertex
+MAIN_SLOTS_2D = numpy.array(
+    [
+        [[1, 0, 1], [0, 1, 1], [0, 0, 0]],  # inside the triangle at (0,0)
+        [[1, 0, 1], [0, 1, 1], [1, 1, 2]],  # inside the triangle at (1,1)
+    ]
+)
+
+# 3D: main vertices of the region, then the two extra vertices
+MAIN_SLOTS_3D = numpy.array(
+    [
+        # tetrahedron at (0,0,0)
+        [[0, 0, 0, 0], [1, 0, 0, 1], [0, 1, 0, 1], [0, 0, 1, 1], [0, 0, 0, -1], [0, 0, 0, -1]],
+        # tetrahedron at (1,1,1)
+        [[1, 1, 0, 2], [1, 0, 1, 2], [0, 1, 1, 2], [1, 1, 1, 3], [0, 0, 0, -1], [0, 0, 0, -1]],
+        # octahedron in between
+        [[1, 0, 0, 1], [0, 1, 0, 1], [0, 0, 1, 1], [1, 1, 0, 2], [1, 0, 1, 2], [0, 1, 1, 2]],
+    ]
+)
+
+
+def pick(cond, a, b):  # numpy.where for the (n, 3) offset arrays below
+    return numpy.where(cond[:, None], a, b)
+
+
+class ScalarNoise:
+    """The reference backend, calls OpenSimplex once per point."""
+
+    def __init__(self, seed: int) -> None:
+        self.noise = OpenSimplex(seed=seed)
+        self.noise2d = self.noise.noise2d
+        self.noise3d = self.noise.noise3d
+
+    def noise2d_points(self, x, y) -> numpy.ndarray:
+        x, y = numpy.broadcast_arrays(numpy.asarray(x, float), numpy.asarray(y, float))
+        noise2d = self.noise2d
+
+        return numpy.array([noise2d(*p) for p in zip(x.ravel().tolist(), y.ravel().tolist())]).reshape(x.shape)
+
+    def noise3d_points(self, x, y, z) -> numpy.ndarray:
+        x, y, z = numpy.broadcast_arrays(numpy.asarray(x, float), numpy.asarray(y, float), numpy.asarray(z, float))
+        noise3d = self.noise3d
+
+        return numpy.array(
+            [noise3d(*p) for p in zip(x.ravel().tolist(), y.ravel().tolist(), z.ravel().tolist())]
+        ).reshape(x.shape)
+
+    def noise2d_grid(self, xs, zs) -> numpy.ndarray:
+        xs = numpy.asarray(xs, float)
+        zs = numpy.asarray(zs, float)
+
+        return self.noise2d_points(xs[None, :], zs[:, None])
+
+    def noise3d_grid(self, xs, ys, zs) -> numpy.ndarray:
+        xs = numpy.asarray(xs, float)
+        ys = numpy.asarray(ys, float)
+        zs = numpy.asarray(zs, float)
+
+        return self.noise3d_points(xs[None, None, :], ys[:, None, None], zs[None, :, None])
+
+
+class ArrayNoise(ScalarNoise):
+    """OpenSimplex evaluated for whole arrays of points at once."""
+
+    def __init__(self, seed: int) -> None:
+        super().__init__(seed)
+
+        # use OpenSimplex's own permutation tables so the noise is the same
+        self.perm = numpy.array(self.noise._perm, numpy.int64)
+        self.perm_grad_index_3d = numpy.array(self.noise._perm_grad_index_3D, numpy.int64) // 3
+
+    def gradients2d(self, xsv: numpy.ndarray, ysv: numpy.ndarray) -> tuple:
+        perm = self.perm
+        index = perm[(perm[xsv & 0xFF] + ysv) & 0xFF] & 0x0E
+
+        return GRADIENTS_2D[index], GRADIENTS_2D[index + 1]
+
+    def gradients3d(self, xsv: numpy.ndarray, ysv: numpy.ndarray, zsv: numpy.ndarray) -> numpy.ndarray:
+        perm = self.perm
+
+        return GRADIENTS_3D[self.perm_grad_index_3d[(perm[(perm[xsv & 0xFF] + ysv) & 0xFF] + zsv) & 0xFF]]
+
+    def noise2d_points(self, x, y) -> numpy.ndarray:
+        x, y = numpy.broadcast_arrays(numpy.asarray(x, float), numpy.asarray(y, float))
+        shape = x.shape
+        x = x.ravel()
+        y = y.ravel()
+
+        # place input coordinates onto grid
+        stretch_offset = (x + y) * STRETCH_CONSTANT_2D
+        xs = x + stretch_offset
+        ys = y + stretch_offset
+
+        # rhombus super-cell origin, in grid and in real coordinates
+        xsb = numpy.floor(xs)
+        ysb = numpy.floor(ys)
+        squish_offset = (xsb + ysb) * SQUISH_CONSTANT_2D
+        dx0 = x - (xsb + squish_offset)
+        dy0 = y - (ysb + squish_offset)
+
+        xins = xs - xsb
+        yins = ys - ysb
+        in_sum = xins + yins
+        far = in_sum > 1  # inside the triangle at (1,1)
+
+        # the extra vertex
+        zins = 1 - in_sum
+        near_closest = (zins > xins) | (zins > yins)
+        ext_near = numpy.where((xins > yins)[:, None], [1, -1, 0], [-1, 1, 0])
+        ext_near = numpy.where(near_closest[:, None], ext_near, [1, 1, 2])
+
+        zins = 2 - in_sum
+        far_closest = (zins < xins) | (zins < yins)
+        ext_far = numpy.where((xins > yins)[:, None], [2, 0, 2], [0, 2, 2])
+        ext_far = numpy.where(far_closest[:, None], ext_far, [0, 0, 0])
+
+        ext = numpy.where(far[:, None], ext_far, ext_near)
+
+        slots = list(MAIN_SLOTS_2D[far.astype(int)].transpose(1, 0, 2)) + [ext]
+
+        xsb = xsb.astype(numpy.int64)
+        ysb = ysb.astype(numpy.int64)
+        value = numpy.zeros(len(x))
+
+        for slot in slots:
+            i, j, s = slot.T
+
+            dx = (dx0 - i) - s * SQUISH_CONSTANT_2D
+            dy = (dy0 - j) - s * SQUISH_CONSTANT_2D
+
+            attn = 2 - dx * dx - dy * dy
+            attn = numpy.where(attn > 0, attn, 0.0)
+            attn *= attn
+
+            g1, g2 = self.gradients2d(xsb + i, ysb + j)
+            value += attn * attn * (g1 * dx + g2 * dy)
+
+        return (value / NORM_CONSTANT_2D).reshape(shape)
+
+    def noise3d_points(self, x, y, z) -> numpy.ndarray:
+        x, y, z = numpy.broadcast_arrays(numpy.asarray(x, float), numpy.asarray(y, float), numpy.asarray(z, float))
+        shape = x.shape
+        x = x.ravel()
+        y = y.ravel()
+        z = z.ravel()
+        n = len(x)
+
+        # place input coordinates on simplectic honeycomb
+        stretch_offset = (x + y + z) * STRETCH_CONSTANT_3D
+        xs = x + stretch_offset
+        ys = y + stretch_offset
+        zs = z + stretch_offset
+
+        # rhombohedron super-cell origin, in honeycomb and in real coordinates
+        xsb = numpy.floor(xs)
+        ysb = numpy.floor(ys)
+        zsb = numpy.floor(zs)
+        squish_offset = (xsb + ysb + zsb) * SQUISH_CONSTANT_3D
+        d0 = numpy.stack([x - (xsb + squish_offset), y - (ysb + squish_offset), z - (zsb + squish_offset)], 1)
+
+        xins = xs - xsb
+        yins = ys - ysb
+        zins = zs - zsb
+        in_sum = xins + yins + zins
+
+        region = numpy.where(in_sum <= 1, 0, numpy.where(in_sum >= 2, 1, 2))
+
+        # the two extra vertices: offsets applied before squishing (pre), after squishing (post), and
+        # the squish multipliers
+        pre0 = numpy.zeros((n, 3), numpy.int64)
+        pre1 = numpy.zeros((n, 3), numpy.int64)
+        post0 = numpy.zeros((n, 3), numpy.int64)
+        post1 = numpy.zeros((n, 3), numpy.int64)
+        squish0 = numpy.zeros(n, numpy.int64)
+        squish1 = numpy.zeros(n, numpy.int64)
+
+        axes = numpy.array([1, 2, 4])  # a "point" is a bit mask of the axes it's offset along
+
+        # tetrahedron at (0,0,0)
+        r = region == 0
+
+        if r.any():
+            xi, yi, zi = xins[r], yins[r], zins[r]
+
+            # which two of (0,0,1), (0,1,0), (1,0,0) are closest
+            a_point = numpy.full(len(xi), 0x01)
+            a_score = xi.copy()
+            b_point = numpy.full(len(xi), 0x02)
+            b_score = yi.copy()
+
+            c = (a_score >= b_score) & (zi > b_score)
+            b_score[c] = zi[c]
+            b_point[c] = 0x04
+
+            c = (a_score < b_score) & (zi > a_score) & ~c
+            a_score[c] = zi[c]
+            a_point[c] = 0x04
+
+            wins = 1 - (xi + yi + zi)
+            closest = (wins > a_score) | (wins > b_score)  # (0,0,0) is one of the closest two
+
+            # (0,0,0) is one of the closest two, the other one decides the extra vertices
+            c = numpy.where(b_score > a_score, b_point, a_point)
+            has = (c[:, None] & axes) != 0
+            e0 = numpy.where(has, 1, [-1, 0, 0])
+            e1 = numpy.where(has, 1, [0, 0, -1])
+            shift = ~has[:, 1] & ~has[:, 0]  # y steps back on ext1 if x doesn't, on ext0 otherwise
+            e1[:, 1] -= shift
+            e0[:, 1] -= ~has[:, 1] & has[:, 0]
+
+            # otherwise the closest two decide them
+            c = a_point | b_point
+            has = (c[:, None] & axes) != 0
+            f0 = numpy.where(has, 1, 0)
+            f1 = numpy.where(has, 1, -1)
+
+            pre0[r] = pick(closest, e0, f0)
+            pre1[r] = pick(closest, e1, f1)
+            squish0[r] = numpy.where(closest, 0, 2)
+            squish1[r] = numpy.where(closest, 0, 1)
+
+        # tetrahedron at (1,1,1)
+        r = region == 1
+
+        if r.any():
+            xi, yi, zi = xins[r], yins[r], zins[r]
+
+            # which two of (1,1,0), (1,0,1), (0,1,1) are closest
+            a_point = numpy.full(len(xi), 0x06)
+            a_score = xi.copy()
+            b_point = numpy.full(len(xi), 0x05)
+            b_score = yi.copy()
+
+            c = (a_score <= b_score) & (zi < b_score)
+            b_score[c] = zi[c]
+            b_point[c] = 0x03
+
+            c = (a_score > b_score) & (zi < a_score) & ~c
+            a_score[c] = zi[c]
+            a_point[c] = 0x03
+
+            wins = 3 - (xi + yi + zi)
+            closest = (wins < a_score) | (wins < b_score)  # (1,1,1) is one of the closest two
+
+            c = numpy.where(b_score < a_score, b_point, a_point)
+            has = (c[:, None] & axes) != 0
+            e0 = numpy.where(has, [2, 1, 1], 0)
+            e1 = numpy.where(has, [1, 1, 2], 0)
+            e_post0 = numpy.zeros_like(e0)
+            e_post1 = numpy.zeros_like(e1)
+            e_post0[:, 1] = has[:, 1] & ~has[:, 0]  # y steps forward once more on ext0 if x doesn't
+            e_post1[:, 1] = has[:, 1] & has[:, 0]  # and on ext1 if it does
+
+            c = a_point & b_point
+            has = (c[:, None] & axes) != 0
+            f0 = numpy.where(has, 1, 0)
+            f1 = numpy.where(has, 2, 0)
+
+            pre0[r] = pick(closest, e0, f0)
+            pre1[r] = pick(closest, e1, f1)
+            post0[r] = pick(closest, e_post0, 0)
+            post1[r] = pick(closest, e_post1, 0)
+            squish0[r] = numpy.where(closest, 3, 1)
+            squish1[r] = numpy.where(closest, 3, 2)
+
+        # octahedron in between
+        r = region == 2
+
+        if r.any():
+            xi, yi, zi = xins[r], yins[r], zins[r]
+
+            # between (0,0,1) and (1,1,0)
+            p = xi + yi
+            a_further = p > 1
+            a_score = numpy.where(a_further, p - 1, 1 - p)
+            a_point = numpy.where(a_further, 0x03, 0x04)
+
+            # between (0,1,0) and (1,0,1)
+            p = xi + zi
+            b_further = p > 1
+            b_score = numpy.where(b_further, p - 1, 1 - p)
+            b_point = numpy.where(b_further, 0x05, 0x02)
+
+            # the closest out of (1,0,0) and (0,1,1) replaces the furthest of the two above, if closer
+            p = yi + zi
+            further = p > 1
+            score = numpy.where(further, p - 1, 1 - p)
+            point = numpy.where(further, 0x06, 0x01)
+
+            c = (a_score <= b_score) & (a_score < score)
+            a_point = numpy.where(c, point, a_point)
+            a_further = numpy.where(c, further, a_further)
+
+            c = (a_score > b_score) & (b_score < score)
+            b_point = numpy.where(c, point, b_point)
+            b_further = numpy.where(c, further, b_further)
+
+            same_side = a_further == b_further
+
+            # both on the (1,1,1) side: (1,1,1) and a step of 2 along the shared axis
+            c = a_point & b_point
+            step = numpy.where(c & 0x01, 0, numpy.where(c & 0x02, 1, 2))
+            far0 = numpy.ones((len(xi), 3), numpy.int64)
+            far1 = 2 * (step[:, None] == numpy.arange(3))
+
+            # both on the (0,0,0) side: (0,0,0) and a permutation of (1,1,-1) on the omitted axis
+            c = a_point | b_point
+            step = numpy.where(c & 0x01 == 0, 0, numpy.where(c & 0x02 == 0, 1, 2))
+            near0 = numpy.zeros((len(xi), 3), numpy.int64)
+            near1 = 1 - 2 * (step[:, None] == numpy.arange(3))
+
+            # one on each side: a permutation of (1,1,-1) and of (0,0,2)
+            c1 = numpy.where(a_further, a_point, b_point)
+            c2 = numpy.where(a_further, b_point, a_point)
+            step = numpy.where(c1 & 0x01 == 0, 0, numpy.where(c1 & 0x02 == 0, 1, 2))
+            mixed0 = 1 - 2 * (step[:, None] == numpy.arange(3))
+            step = numpy.where(c2 & 0x01, 0, numpy.where(c2 & 0x02, 1, 2))
+            mixed_post = 2 * (step[:, None] == numpy.arange(3))
+
+            pre0[r] = pick(same_side, pick(a_further, far0, near0), mixed0)
+            pre1[r] = pick(same_side, pick(a_further, far1, near1), 0)
+            post1[r] = pick(same_side, 0, mixed_post)
+            squish0[r] = numpy.where(same_side, numpy.where(a_further, 3, 0), 1)
+            squish1[r] = numpy.where(same_side, numpy.where(a_further, 2, 1), 2)
+
+        main = MAIN_SLOTS_3D[region]
+        slots = [(main[:, i, :3], main[:, i, 3], 0) for i in range(6)]
+        slots += [(pre0, squish0, post0), (pre1, squish1, post1)]
+
+        sb = numpy.stack([xsb, ysb, zsb], 1).astype(numpy.int64)
+        value = numpy.zeros(n)
+
+        for pre, squish, post in slots:
+            d = (d0 - pre) - (squish * SQUISH_CONSTANT_3D)[:, None] - post
+            dx, dy, dz = d.T
+
+            attn = 2 - dx * dx - dy * dy - dz * dz
+            attn = numpy.where((attn > 0) & (squish >= 0), attn, 0.0)
+            attn *= attn
+
+            v = sb + pre + post
+            g = self.gradients3d(v[:, 0], v[:, 1], v[:, 2])
+            value += attn * attn * (g[:, 0] * dx + g[:, 1] * dy + g[:, 2] * dz)
+
+        return (value / NORM_CONSTANT_3D).reshape(shape)
+
+
+class PermTableNoise(ArrayNoise):
+    """ArrayNoise with the chained permutation lookups for gradients precomputed into tables."""
+
+    def __init__(self, seed: int) -> None:
+        super().__init__(seed)
+
+        perm = self.perm
+        xy = perm[(perm[:, None] + numpy.arange(256)) & 0xFF].astype(numpy.uint16)  # perm[(perm[x] + y) & 0xFF]
+
+        self.grad_index_2d = (xy & 0x0E).ravel()
+        self.grad_index_3d = self.perm_grad_index_3d.astype(numpy.uint8)[(xy[:, :, None] + numpy.arange(256, dtype=numpy.uint16)) & 0xFF].ravel()
+
+    def gradients2d(self, xsv: numpy.ndarray, ysv: numpy.ndarray) -> tuple:
+        index = self.grad_index_2d[((xsv & 0xFF) << 8) | (ysv & 0xFF)]
+
+        return GRADIENTS_2D[index], GRADIENTS_2D[index + 1]
+
+    def gradients3d(self, xsv: numpy.ndarray, ysv: numpy.ndarray, zsv: numpy.ndarray) -> numpy.ndarray:
+        return GRADIENTS_3D[self.grad_index_3d[((xsv & 0xFF) << 16) | ((ysv & 0xFF) << 8) | (zsv & 0xFF)]]
+
+
+BACKENDS = {"scalar": ScalarNoise, "array": ArrayNoise, "permtable": PermTableNoise}
+
+
+def make_noise(seed: int, backend: str = "scalar") -> ScalarNoise:
+    return BACKENDS[backend](seed)
+
+
+def check_accuracy(noise: ScalarNoise, reference: ScalarNoise, n: int = 20000, span: float = 1000) -> tuple:
+    """Largest difference from the reference backend, for random points and for integer points."""
+
+    rand = numpy.random.default_rng(0)
+    errors = []
+
+    for points in (rand.uniform(-span, span, (3, n)), numpy.floor(rand.uniform(-span, span, (3, n)))):
+        error_2d = numpy.abs(noise.noise2d_points(*points[:2]) - reference.noise2d_points(*points[:2])).max()
+        error_3d = numpy.abs(noise.noise3d_points(*points) - reference.noise3d_points(*points)).max()
+        errors.append(max(error_2d, error_3d))
+
+    return tuple(errors)
+
+
+def measure_throughput(noise: ScalarNoise, n: int = 100000) -> tuple:
+    """Points per second for batch 2d and 3d noise."""
+
+    points = numpy.random.default_rng(0).uniform(-1000, 1000, (3, n))
+
+    start = pf()
+    noise.noise2d_points(*points[:2])
+    speed_2d = n / (pf() - start)
+
+    start = pf()
+    noise.noise3d_points(*points)
+    speed_3d = n / (pf() - start)
+
+    return speed_2d, speed_3d
+
+
+def main(argv: list = None) -> None:
+    # checks every backend against the reference and how fast each one is, exits with 1 if one of
+    # them drifts from it or is not faster than it by MIN_SPEEDUP
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(prog="petus.noise_backends", description="Checks the noise backends against the reference.")
+    parser.add_argument("--seed", type=int, default=1281134870109837483)
+    parser.add_argument("--min-speedup", type=float, default=MIN_SPEEDUP)
+    args = parser.parse_args(argv)
+
+    reference = make_noise(args.seed, "scalar")
+    reference_speed = None
+    failed = []
+
+    for name in BACKENDS:
+        noise = make_noise(args.seed, name)
+        error, error_int = check_accuracy(noise, reference)
+        speed = measure_throughput(noise, 20000 if name == "scalar" else 200000)
+
+        print(f"{name:>9}: max error {error:.1e} ({error_int:.1e} at integer points), {speed[0]:,.0f} 2d / {speed[1]:,.0f} 3d points/s")
+
+        if name == "scalar":
+            reference_speed = speed
+            continue
+
+        if error > TOLERANCE or error_int > TOLERANCE:
+            failed.append(f"{name} doesn't match the reference")
+
+        speedup = min(s / r for s, r in zip(speed, reference_speed))
+
+        if speedup < args.min_speedup:
+            failed.append(f"{name} is only {speedup:.1f} times as fast as the reference")
+
+    print("\n".join(failed) if failed else "all backends ok")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import os
+
+import numpy
+
+# Top-down previews of a world, one pixel per column of blocks (or per scale x scale columns), so a
+# world can be checked without writing and opening an obj file. Works on (256, Z, X) block arrays,
+# like World.blocks, world_array() or an npy file written with python -m petus --format npy:
+#
+#   python -m petus.preview world.npy preview.png --overlays caves,ores
+
+MTL = os.path.join(os.path.dirname(__file__), "test.mtl")
+
+ORES = 6  # block ids from here up are ores, see the palette in main.py
+
+
+def mtl_colours(path: str = MTL) -> dict:
+    """The Kd colour of every material in an mtl file, as 0 to 255 rgb."""
+
+    colours = {}
+    name = None
+
+    with open(path) as f:
+        for line in f:
+            words = line.split()
+
+            if words and words[0] == "newmtl":
+                name = words[1]
+            elif words and words[0] == "Kd":
+                colours[name] = tuple(round(float(c) * 255) for c in words[1:4])
+
+    return colours
+
+
+def sprite_colours(blocks: list) -> dict:
+    """The mean colour of every block's sprite (see atlas.py), leaving out transparent pixels."""
+
+    from PIL import Image  # pip install pillow
+    from .atlas import SPRITE_DIR, SPRITES, TILE, TINTS
+
+    colours = {}
+
+    for block in blocks:
+        sprite = SPRITES.get(block, block)
+        image = Image.open(os.path.join(SPRITE_DIR, sprite + ".png")).convert("RGBA").crop((0, 0, TILE, TILE))
+        pixels = numpy.asarray(image, float).reshape(-1, 4)
+
+        rgb = (pixels[:, :3] * pixels[:, 3:]).sum(0) / max(pixels[:, 3].sum(), 1)
+        rgb *= numpy.array(TINTS.get(sprite, (255, 255, 255))) / 255
+
+        colours[block] = tuple(int(c) for c in rgb.round())
+
+    return colours
+
+
+def colour_table(palette: dict, source: str = "mtl") -> numpy.ndarray:
+    """A (256, 3) table of the colour of every block id, from test.mtl or from the sprites."""
+
+    names = [palette[i] for i in range(1, 13)]
+    colours = mtl_colours() if source == "mtl" else sprite_colours(names)
+    table = numpy.zeros((256, 3), numpy.uint8)
+
+    for i, name in enumerate(names, 1):
+        table[i] = colours.get(name, (255, 0, 255))
+
+    return table
+
+
+def column_tops(blocks: numpy.ndarray, lowest: int = 1, slab: int = 16) -> numpy.ndarray:
+    """The y of the highest block with an id of at least lowest in every column, -1 where there's none.
+
+    Goes down the world a slab at a time and only looks closer at the columns whose highest block is
+    in that slab, so most of the work is a max() over each slab.
+    """
+
+    top = numpy.full(blocks.shape[1:], -1, numpy.int16)
+    missing = numpy.ones(blocks.shape[1:], bool)
+
+    for y2 in range(blocks.shape[0], 0, -slab):
+        y1 = max(y2 - slab, 0)
+        found = missing & (blocks[y1:y2].max(0) >= lowest)
+
+        if found.any():
+            z, x = numpy.nonzero(found)
+            column = blocks[y1:y2, z, x] >= lowest  # (slab, columns)
+
+            top[z, x] = y2 - 1 - column[::-1].argmax(0)
+            missing &= ~found
+
+            if not missing.any():
+                break
+
+    return top
+
+
+def render(blocks, colours: numpy.ndarray, shading: bool = True, overlays=(), scale: int = 1, z0: int = 0, north=None) -> numpy.ndarray:
+    """A (Z, X, 3) rgb image of a (256, Z, X) block array seen from above.
+
+    colours is a table from colour_table(). shading makes higher ground lighter, and columns lighter
+    or darker than the one north of them if they're higher or lower. The overlays are "caves", which
+    tints columns by how much air is under their top block, and "ores", which shows the highest ore in
+    a column instead of its top block. scale takes every scale-th column in both directions.
+
+    Rows of a world can be rendered apart and stacked (see stream() in main.py): z0 is the z of the
+    first row of blocks in the whole world, so the same rows are taken as if it was rendered in one
+    go, and north is the column_tops() of the last row taken before them, for the relief of the first.
+    """
+
+    if scale > 1:
+        blocks = blocks[:, -z0 % scale :: scale, ::scale]
+
+    top = column_tops(blocks)
+    z, x = numpy.indices(top.shape)
+    image = colours[blocks[top.clip(0), z, x]].astype(float)
+    image[top < 0] = 0
+
+    if shading:
+        shade = 0.6 + 0.6 * top.clip(0, 127) / 127  # fixed, so rows rendered apart still match
+
+        # relief, compared to the column to the north
+        slope = numpy.zeros(top.shape)
+        slope[1:] = numpy.clip(top[1:].astype(int) - top[:-1], -4, 4)
+
+        if north is not None and len(top):
+            slope[0] = numpy.clip(top[0].astype(int) - north, -4, 4)
+        shade += slope * 0.05
+
+        image *= shade[:, :, None]
+
+    if "caves" in overlays:
+        air = numpy.zeros(top.shape, int)
+
+        for y1 in range(0, blocks.shape[0], 16):
+            air += (blocks[y1 : y1 + 16] == 0).sum(0)
+
+        cave = (air - (blocks.shape[0] - 1 - top)).clip(0)  # air under the top block
+        alpha = numpy.minimum(cave / 64, 1)[:, :, None] * 0.7
+        image = image * (1 - alpha) + numpy.array([255, 0, 160]) * alpha
+
+    if "ores" in overlays:
+        ore_top = column_tops(blocks, ORES)
+        ore = ore_top >= 0
+        image[ore] = colours[blocks[ore_top[ore], z[ore], x[ore]]]
+
+    return image.clip(0, 255).astype(numpy.uint8)
+
+
+def save_png(path: str, image: numpy.ndarray) -> None:
+    from PIL import Image  # pip install pillow
+
+    Image.fromarray(image, "RGB").save(path)
+
+
+def main(argv: list = None) -> None:
+    from time import perf_counter as pf
+    import argparse
+
+    from .main import palette
+
+    parser = argparse.ArgumentParser(prog="petus.preview", description="Renders an npy world from above.")
+    parser.add_argument("world", help="npy file from python -m petus --format npy")
+    parser.add_argument("output", help="png file to write")
+    parser.add_argument("--colours", choices=("mtl", "sprites"), default="mtl")
+    parser.add_argument("--overlays", default="", help="comma separated, caves and/or ores")
+    parser.add_argument("--scale", type=int, default=1, help="blocks per pixel along each side")
+    parser.add_argument("--flat", action="store_true", help="no height shading")
+    args = parser.parse_args(argv)
+
+    blocks = numpy.load(args.world, mmap_mode="r")
+
+    start = pf()
+    image = render(blocks, colour_table(palette, args.colours), not args.flat, args.overlays.split(","), args.scale)
+    save_png(args.output, image)
+
+    print(f"Rendered {image.shape[1]}x{image.shape[0]} preview. ({(pf() - start):02.02f} seconds)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+from hashlib import sha1
+from time import perf_counter as pf
+import io
+import json
+import os
+import sys
+
+from .main import dump_to_obj, generate_world, is_world, palette
+import numpy
+
+# Golden snapshots, to check that the fast paths (noise backends, world volume, parallel carving,
+# cached meshing...) still generate exactly the same worlds as the plain code does. A snapshot is
+# the hash of every chunk after every stage plus the hash of the exported mesh, for each seed and
+# radius in CASES. The golden ones in snapshots.json were recorded with the defaults (dict chunks,
+# scalar noise, one worker, dump_to_obj()), re-record them only when the world is meant to change:
+#
+#   python -m petus.snapshots record
+#   python -m petus.snapshots check --world-volume --workers 4 --noise-backend permtable
+#   python -m petus.snapshots grow
+
+GOLDEN = os.path.join(os.path.dirname(__file__), "snapshots.json")
+
+CASES = [(1281134870109837483, 1), (1281134870109837483, 2), (42, 1), (-7, 2)]  # (seed, radius)
+
+STAGES = ("terrain", "ores", "caves")
+
+
+def chunk_hash(chunk) -> str:
+    return sha1(numpy.asarray(chunk, numpy.uint8).tobytes()).hexdigest()
+
+
+def face_hash(obj: str) -> str:
+    """Hash of the faces of an obj file, that doesn't depend on how its vertices are numbered.
+
+    Every face is turned into its material and corner positions and the faces are sorted, so meshes
+    written by dump_to_obj() and dump_to_obj_cached() can be compared.
+    """
+
+    points = []
+    faces = []
+    material = None
+
+    for line in obj.splitlines():
+        if line.startswith("v "):
+            points.append(line[2:])
+        elif line.startswith("usemtl "):
+            material = line[7:]
+        elif line.startswith("f "):
+            corners = [int(i) for i in line[2:].split()]
+            faces.append((material, *[points[i - 1 if i > 0 else i] for i in corners]))
+
+    faces.sort()
+
+    return sha1("\n".join(" ".join(f) for f in faces).encode()).hexdigest()
+
+
+def take_snapshot(seed: int, radius: int, cached_mesh: bool = False, **options) -> dict:
+    """Generates a world like generate_world() does (options are passed on) and hashes every stage of it."""
+
+    snapshot = {}
+
+    def on_stage(stage, chunks) -> None:
+        snapshot[stage] = {f"{cx},{cz}": chunk_hash(chunks[cx, cz]) for cx, cz in chunks.keys()}
+
+    chunks, pending = generate_world(seed, radius, STAGES, on_stage=on_stage, **options)
+    file = io.StringIO()
+
+    if cached_mesh:
+        from .meshing import MeshCache, dump_to_obj_cached
+
+        dump_to_obj_cached(file, chunks, MeshCache(palette))
+    else:
+        dump_to_obj(file, chunks)
+        snapshot["mesh"] = sha1(file.getvalue().encode()).hexdigest()  # only dump_to_obj() gives the same text
+
+    snapshot["faces"] = face_hash(file.getvalue())
+
+    if is_world(chunks):
+        chunks.close()
+
+    return snapshot
+
+
+def first_divergence(golden: dict, snapshot: dict) -> tuple:
+    """The first stage and chunk where the snapshot differs from the golden one, and how many differ in total.
+
+    Returns (None, None, 0) if they're the same.
+    """
+
+    first = (None, None)
+    diverged = 0
+
+    for stage in STAGES:
+        for key, h in golden[stage].items():
+            if snapshot[stage].get(key) != h:
+                diverged += 1
+
+                if first[0] is None:
+                    first = (stage, key)
+
+    for stage in ("mesh", "faces"):
+        if stage in snapshot and snapshot[stage] != golden[stage]:
+            diverged += 1
+
+            if first[0] is None:
+                first = (stage, None)
+
+    return (*first, diverged)
+
+
+def record(cases: list = CASES, path: str = GOLDEN) -> None:
+    golden = {}
+
+    for seed, radius in cases:
+        golden[f"{seed}:{radius}"] = take_snapshot(seed, radius)
+
+    with open(path, "w") as f:
+        json.dump(golden, f, indent=1)
+
+
+def check(path: str = GOLDEN, cases: list = None, **options) -> bool:
+    """Checks the world against every golden snapshot (or only the given cases), prints a report."""
+
+    with open(path) as f:
+        golden = json.load(f)
+
+    failed = False
+    report = []
+
+    for case, expected in golden.items():
+        seed, radius = [int(n) for n in case.split(":")]
+
+        if cases is not None and (seed, radius) not in cases:
+            continue
+
+        start = pf()
+        stage, key, diverged = first_divergence(expected, take_snapshot(seed, radius, **options))
+
+        if stage is None:
+            report.append(f"seed {seed} radius {radius}: ok ({(pf() - start):02.02f} seconds)")
+        else:
+            where = f"{stage} stage" if key is None else f"chunk {key} after the {stage} stage"
+            report.append(f"seed {seed} radius {radius}: diverged first at {where} ({diverged} differences)")
+            failed = True
+
+    print("\n".join(report))
+
+    return not failed
+
+
+def check_growth(cases: list = None, segments: int = 25, **options) -> bool:
+    """Checks that growing each world from radius - 1 to radius (see generate_world()) carves it the
+    same as generating it in one go, both with worms of a fixed length. Prints a report."""
+
+    failed = False
+    report = []
+
+    for seed, radius in CASES if cases is None else cases:
+        start = pf()
+
+        whole = generate_world(seed, radius, STAGES, worm_segments=segments, **options)[0]
+        chunks, pending = generate_world(seed, radius - 1, STAGES, worm_segments=segments, **options)
+        chunks, pending = generate_world(seed, radius, STAGES, worm_segments=segments, chunks=chunks, pending=pending, **options)
+
+        diverged = [f"{cx},{cz}" for cx, cz in whole.keys() if chunk_hash(whole[cx, cz]) != chunk_hash(chunks[cx, cz])]
+
+        if diverged:
+            report.append(f"seed {seed} radius {radius}: grown world differs in chunks {' '.join(diverged)}")
+            failed = True
+        else:
+            report.append(f"seed {seed} radius {radius}: grown world ok ({(pf() - start):02.02f} seconds)")
+
+    print("\n".join(report))
+
+    return not failed
+
+
+def main(argv: list = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="petus.snapshots", description="Records or checks the golden snapshots.")
+    parser.add_argument("action", choices=("record", "check", "grow"), help="grow checks growing worlds in two passes")
+    parser.add_argument("--case", action="append", help="seed:radius to check, all of them by default")
+    parser.add_argument("--noise-backend", default="scalar")
+    parser.add_argument("--world-volume", action="store_true")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--cache-dir")
+    parser.add_argument("--cached-mesh", action="store_true", help="mesh with dump_to_obj_cached(), needs --world-volume")
+    args = parser.parse_args(argv)
+
+    if args.action == "record":
+        record()
+        return
+
+    cases = None if args.case is None else [tuple(int(n) for n in c.split(":")) for c in args.case]
+
+    if args.action == "grow":  # only dicts of chunks can grow
+        sys.exit(0 if check_growth(cases, noise_backend=args.noise_backend) else 1)
+
+    ok = check(
+        cases=cases,
+        cached_mesh=args.cached_mesh,
+        noise_backend=args.noise_backend,
+        world_volume=args.world_volume or args.workers > 1 or args.cached_mesh,
+        workers=args.workers,
+        cache_dir=args.cache_dir,
+    )
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
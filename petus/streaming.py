@@ -0,0 +1,122 @@
+from time import perf_counter as pf
+from random import Random
+import math
+
+from .main import (
+    HEIGHT_FACTOR,
+    NOISE_BACKEND,
+    PendingEdits,
+    load_terrain,
+    make_ore_pockets,
+    noisy_chunk,
+    palette,
+    perlin_worms,
+    save_terrain,
+)
+from .meshing import mesh_chunk
+from .noise_backends import make_noise
+from .world import World
+
+# Streaming generation, for worlds too big to keep in memory (python -m petus 512 --stream). The world
+# is swept a row of chunks (along x) at a time, in increasing z, and only a window of rows is kept:
+# the row being generated, the rows the worms spawned in it can still carve into, and one more for
+# culling the back faces of the oldest of them. Once no worm that's still to come can reach a row,
+# it's meshed, written out and dropped, so memory grows with the width of the world, not its area.
+#
+# Worms have a fixed length here (in perlin_worms() it otherwise grows with the world), and carving
+# that reaches rows that aren't generated yet is kept as pending edits until they are, so the output
+# has the same faces as generate_world() and dump_to_obj() with the same worm_segments.
+
+SEGMENTS = 25  # worm segments, the same as pixl uses
+SEGMENT_LEN = 3  # steps per segment, see perlin_worms()
+
+
+def worm_reach(segments: int) -> int:
+    # how many chunks away from the one it spawned in a worm can carve: it moves a block per step at
+    # most, and carves a sphere of radius 4 around where it is, rounded towards 0
+    return math.ceil((segments * SEGMENT_LEN + 5) / 16)
+
+
+def stream_world(
+    file,
+    seed: int,
+    radius: int,
+    stages=("terrain", "ores", "caves"),
+    noise_backend: str = NOISE_BACKEND,
+    segments: int = SEGMENTS,
+    workers: int = 1,
+    uvs: dict = None,
+    on_row=None,
+    cache_dir: str = None,
+) -> int:
+    """Generates the chunks from -radius to radius on both axes and writes their mesh to file as it goes.
+
+    Returns how many edits were left pending for chunks outside the world. uvs is for textured output,
+    see mesh_section(). on_row(cz, blocks) is called with the (256, 16, X) blocks of every finished row.
+    Terrain is cached in cache_dir if it's given, like generate_world() does.
+    """
+
+    randomness = Random(seed)
+    noise = make_noise(seed, noise_backend)
+    pending = PendingEdits()
+    reach = worm_reach(segments) if "caves" in stages else 0
+
+    # the row being generated is the last one, the first one is only there for culling
+    window = World(-radius, -radius - reach - 1, radius, -radius + 1, shared=workers > 1)
+    dropped = 0
+    start = pf()
+
+    print(f"Streaming {(radius*2)**2} chunks, {reach + 2} rows of {radius * 2} at a time...")
+
+    for cz in range(-radius, radius + reach):
+        if cz < radius:
+            for cx in range(-radius, radius):
+                # one chunk at a time, so the nested lists don't pile up
+                terrain = None if cache_dir is None else load_terrain(cache_dir, seed, HEIGHT_FACTOR, cx, cz)
+
+                if terrain is None:
+                    terrain = noisy_chunk(noise, randomness, cx, cz)
+
+                    if cache_dir is not None:
+                        save_terrain(cache_dir, seed, HEIGHT_FACTOR, cx, cz, terrain)
+                else:
+                    terrain = terrain.tolist()
+
+                chunk = {(cx, cz): terrain}
+
+                if "ores" in stages:
+                    make_ore_pockets(chunk, randomness, noise)
+
+                if (cx, cz) in pending:
+                    pending.apply(chunk, cx, cz)
+
+                window[cx, cz] = chunk[cx, cz]
+
+            if "caves" in stages:
+                spawn = [(cx, cz) for cx in range(-radius, radius)]
+                perlin_worms(window, randomness, noise, pending, spawn, workers, segments)
+
+            # carving that went past the sides or the end of the world is never going to be used
+            for key in [k for k in pending.edits if not (-radius <= k[0] < radius and k[1] < radius)]:
+                dropped += len(pending.edits.pop(key))
+
+        done = cz - reach  # no worm that's still to come reaches this row
+
+        if done >= -radius:
+            if on_row is not None:
+                z = (done - window.min_cz) * 16
+                on_row(done, window.blocks[:, z : z + 16])
+
+            for cx in range(-radius, radius):
+                file.write(mesh_chunk(window, cx, done, palette, uvs))
+
+            if (done + radius + 1) % 64 == 0:
+                print(f"{done + radius + 1} of {radius * 2} rows done. ({(pf() - start):02.02f} seconds)")
+
+        window.scroll()
+
+    window.close()
+
+    print(f"Done streaming. ({(pf() - start):02.02f} seconds for {(radius*2)**2} chunks)")
+
+    return dropped
@@ -0,0 +1,144 @@
+from time import perf_counter as pf
+from multiprocessing import Pool
+import contextlib
+import csv
+import io
+import re
+
+import numpy
+
+from . import main as generator
+
+# Seed sweeps, for tuning the generator by its statistics instead of by looking at obj files. Every
+# seed (and height factor, if more than one is given) is generated headless in a worker process,
+# without meshing, and summed up in one row of a csv table:
+#
+#   python -m petus.sweep --seeds 0-199 --radius 1 --height-factor 64,72,80 --workers 8 --output sweep.csv
+
+HISTOGRAM_BIN = 8  # blocks of surface height per histogram column
+
+
+def world_stats(seed: int, radius: int, height_factor: int, stages=("terrain", "ores", "caves"), noise_backend: str = "array") -> dict:
+    """Generates a world and returns its statistics as one row of the table."""
+
+    stats = {}
+    stone = {}
+
+    def on_stage(stage, chunks) -> None:
+        stone[stage] = int((chunks.blocks == generator.palette["stone"]).sum())
+
+    start = pf()
+
+    with contextlib.redirect_stdout(io.StringIO()):  # the progress of hundreds of worlds isn't much use
+        chunks, pending = generator.generate_world(
+            seed,
+            radius,
+            stages,
+            noise_backend,
+            world_volume=True,
+            workers=1,
+            on_stage=on_stage,
+            stats=stats,
+            height_factor=height_factor,
+        )
+
+    blocks = chunks.blocks
+    row = {"seed": seed, "radius": radius, "height_factor": height_factor, "seconds": round(pf() - start, 3)}
+
+    for block, count in enumerate(numpy.bincount(blocks.ravel(), minlength=13)[:13].tolist()):
+        row[generator.palette[block]] = count
+
+    # carving only turns stone into air
+    before_caves = stone["ores"] if "ores" in stone else stone["terrain"]
+    row["cave_volume"] = before_caves - stone["caves"] if "caves" in stone else 0
+    row["worms"] = stats.get("worms", 0)
+
+    veins = stats.get("veins", {})
+    row["veins"] = sum(veins.values())
+
+    for i in range(6, 13):
+        row[f"{generator.palette[i]}_veins"] = veins.get(generator.palette[i], 0)
+
+    # the surface is the grass or water block on top of every column
+    surface = (blocks == generator.palette["grass"]) | (blocks == generator.palette["water"])
+    height = blocks.shape[0] - 1 - surface[::-1].argmax(0)
+    height = height[surface.any(0)]
+
+    row["surface_min"] = int(height.min()) if height.size else 0
+    row["surface_mean"] = round(float(height.mean()), 3) if height.size else 0
+    row["surface_max"] = int(height.max()) if height.size else 0
+
+    histogram = numpy.bincount(height // HISTOGRAM_BIN, minlength=256 // HISTOGRAM_BIN).tolist()
+
+    for i, count in enumerate(histogram):
+        row[f"height_{i * HISTOGRAM_BIN}"] = count
+
+    chunks.close()
+
+    return row
+
+
+def run(job: tuple) -> dict:
+    return world_stats(*job)
+
+
+def parse_seeds(text: str) -> list:
+    """"1,5,10-19" -> [1, 5, 10, 11, ..., 19]"""
+
+    seeds = []
+
+    for part in text.split(","):
+        first, last = re.fullmatch(r"(-?\d+)(?:-(-?\d+))?", part.strip()).groups()
+
+        if last is None:
+            seeds.append(int(first))
+        else:
+            seeds += range(int(first), int(last) + 1)
+
+    return seeds
+
+
+def sweep(seeds: list, radius: int, height_factors: list, stages, noise_backend: str, workers: int, output: str) -> None:
+    jobs = [(seed, radius, hf, stages, noise_backend) for hf in height_factors for seed in seeds]
+    start = pf()
+
+    print(f"Sweeping {len(jobs)} worlds of {(radius*2)**2} chunks with {workers} workers...")
+
+    with open(output, "w", newline="") as f:
+        writer = None
+
+        with Pool(workers) as pool:
+            for i, row in enumerate(pool.imap(run, jobs), 1):
+                if writer is None:
+                    writer = csv.DictWriter(f, list(row))
+                    writer.writeheader()
+
+                writer.writerow(row)
+
+                if i % 10 == 0 or i == len(jobs):
+                    print(f"{i} of {len(jobs)} worlds done. ({(pf() - start):02.02f} seconds)")
+
+    print(f"Done sweeping. ({(pf() - start):02.02f} seconds, written to {output})")
+
+
+def main(argv: list = None) -> None:
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(prog="petus.sweep", description="Generates many seeds and writes their statistics to a csv file.")
+    parser.add_argument("--seeds", default="0-99", help="comma separated seeds and ranges, like 1,5,10-19")
+    parser.add_argument("--radius", type=int, default=1)
+    parser.add_argument("--height-factor", default=str(generator.HEIGHT_FACTOR), help="comma separated, every seed is run with each")
+    parser.add_argument("--stages", default="terrain,ores,caves")
+    parser.add_argument("--noise-backend", default="array", help="scalar, array or permtable")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default="sweep.csv")
+    args = parser.parse_args(argv)
+
+    height_factors = [int(h) for h in args.height_factor.split(",")]
+
+    sweep(parse_seeds(args.seeds), args.radius, height_factors, args.stages.split(","), args.noise_backend, args.workers, args.output)
+
+
+if __name__ == "__main__":
+    main()
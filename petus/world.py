@@ -0,0 +1,177 @@
+from multiprocessing import shared_memory
+import numpy
+
+# here, the "world" is every chunk of a rectangular area stored in one (256, Z, X) array of block
+# states, each chunk being a (256, 16, 16) view into it, so code that works across chunk borders can
+# index world coordinates directly instead of going through chunks[x // 16, z // 16][y][z % 16][x % 16]
+
+
+class World:
+    # shared is True to put the world in shared memory (so worker processes can carve it, see
+    # carving.py), or the name of an existing world's shared memory to attach to. A world memory
+    # mapped to path is shared through the file instead, workers open it again with mode "r+".
+
+    def __init__(
+        self, min_cx: int, min_cz: int, max_cx: int, max_cz: int, path: str = None, shared=False, mode: str = "w+"
+    ) -> None:
+        self.min_cx = min_cx
+        self.min_cz = min_cz
+        self.max_cx = max_cx
+        self.max_cz = max_cz
+
+        #        y          z                          x
+        shape = (256, (max_cz - min_cz) * 16, (max_cx - min_cx) * 16)
+
+        self.shm = None
+        self.path = path
+
+        if path is not None:  # memory mapped, for worlds that don't fit in ram
+            self.blocks = numpy.memmap(path, numpy.uint8, mode, shape=shape)
+        elif shared:
+            if shared is True:
+                self.shm = shared_memory.SharedMemory(create=True, size=shape[0] * shape[1] * shape[2])
+            else:
+                self.shm = shared_memory.SharedMemory(shared)
+
+            self.blocks = numpy.ndarray(shape, numpy.uint8, self.shm.buf)
+        else:
+            self.blocks = numpy.zeros(shape, numpy.uint8)
+
+        # which 16 block high sections of which chunks changed since they were last meshed (see meshing.py)
+        self.dirty = numpy.ones((max_cz - min_cz, max_cx - min_cx, 16), bool)
+
+    def close(self, unlink: bool = True) -> None:
+        """Frees the world's shared memory, if it has any. The world can't be used afterwards."""
+
+        if self.shm is not None:
+            del self.blocks  # the array has to go before the memory it points into
+
+            self.shm.close()
+
+            if unlink:
+                self.shm.unlink()
+
+            self.shm = None
+
+    # the world can be used anywhere the chunks dict is: world[cx, cz] is a zero-copy view of the chunk
+
+    def keys(self):
+        # same order the chunks dict is filled in
+        for cx in range(self.min_cx, self.max_cx):
+            for cz in range(self.min_cz, self.max_cz):
+                yield cx, cz
+
+    def __iter__(self):
+        return self.keys()
+
+    def __len__(self) -> int:
+        return (self.max_cx - self.min_cx) * (self.max_cz - self.min_cz)
+
+    def __contains__(self, key) -> bool:
+        cx, cz = key
+        return self.min_cx <= cx < self.max_cx and self.min_cz <= cz < self.max_cz
+
+    def chunk_slice(self, cx: int, cz: int) -> tuple:
+        if (cx, cz) not in self:
+            raise KeyError((cx, cz))
+
+        z = (cz - self.min_cz) * 16
+        x = (cx - self.min_cx) * 16
+
+        return slice(None), slice(z, z + 16), slice(x, x + 16)
+
+    def __getitem__(self, key) -> numpy.ndarray:
+        return self.blocks[self.chunk_slice(*key)]
+
+    def __setitem__(self, key, chunk) -> None:
+        self.blocks[self.chunk_slice(*key)] = chunk
+        self.mark_dirty(*key)
+
+    def mark_dirty(self, cx: int, cz: int, y1: int = 0, y2: int = 256) -> None:
+        # for code that writes into a chunk's view directly
+        self.dirty[cz - self.min_cz, cx - self.min_cx, y1 // 16 : (y2 - 1) // 16 + 1] = True
+
+    def mark_box_dirty(self, y1: int, y2: int, z1: int, z2: int, x1: int, x2: int) -> None:
+        # y1:y2, z1:z2, x1:x2 in array coordinates, like sphere_box() gives
+        self.dirty[z1 // 16 : (z2 - 1) // 16 + 1, x1 // 16 : (x2 - 1) // 16 + 1, y1 // 16 : (y2 - 1) // 16 + 1] = True
+
+    def sphere_box(self, y: int, z: int, x: int, radius: int) -> tuple:
+        """The part of a sphere's bounding box that's inside the world, in array coordinates, or None."""
+
+        oz = self.min_cz * 16  # world coordinates of the array's origin
+        ox = self.min_cx * 16
+
+        y1, y2 = max(y - radius, 0), min(y + radius, 256)
+        z1, z2 = max(z - radius - oz, 0), min(z + radius - oz, self.blocks.shape[1])
+        x1, x2 = max(x - radius - ox, 0), min(x + radius - ox, self.blocks.shape[2])
+
+        if y1 >= y2 or z1 >= z2 or x1 >= x2:
+            return None
+
+        return y1, y2, z1, z2, x1, x2
+
+    def remove_sphere(self, y: int, z: int, x: int, radius: int, pending=None) -> None:
+        """Same as remove_sphere() in main.py, but in one go on the world array."""
+
+        if pending is not None:
+            pending.carve_sphere(self, y, z, x, radius)
+
+        box = self.sphere_box(y, z, x, radius)
+
+        if box is None:
+            return
+
+        y1, y2, z1, z2, x1, x2 = box
+        oz = self.min_cz * 16
+        ox = self.min_cx * 16
+
+        dy, dz, dx = numpy.ogrid[y1 - y : y2 - y, z1 + oz - z : z2 + oz - z, x1 + ox - x : x2 + ox - x]
+
+        blocks = self.blocks[y1:y2, z1:z2, x1:x2]
+        carved = ((dy * dy + dz * dz + dx * dx) < radius * radius) & (blocks == 2)
+
+        if carved.any():
+            blocks[carved] = 0  # stone -> air
+            self.mark_box_dirty(*box)
+
+    def scroll(self, rows: int = 1) -> None:
+        """Moves the world rows chunks along z, dropping the first rows and adding empty ones at the end.
+
+        For sweeping a window over a bigger world (see streaming.py) without allocating a new array.
+        """
+
+        n = rows * 16
+
+        self.blocks[:, :-n] = self.blocks[:, n:]
+        self.blocks[:, -n:] = 0
+        self.dirty[:-rows] = self.dirty[rows:]
+        self.dirty[-rows:] = True
+
+        self.min_cz += rows
+        self.max_cz += rows
+
+    def visible(self) -> numpy.ndarray:
+        return visible_blocks(self.blocks)
+
+
+def visible_blocks(blocks: numpy.ndarray) -> numpy.ndarray:
+    """Which blocks dump_to_obj() draws, for a (256, Z, X) array of whole chunks at once.
+
+    Mirrors the per-block check there: blocks on a chunk's border (or at the top of the world)
+    are always drawn, anything else is drawn if one of its 8 diagonal neighbours is air. Like
+    the nested lists, y - 1 wraps around to the top of the world at y = 0.
+    """
+
+    air = blocks == 0
+    visible = numpy.zeros(air.shape, bool)
+
+    for dy in (-1, 1):
+        for dz in (-1, 1):
+            for dx in (-1, 1):
+                visible |= numpy.roll(air, (-dy, -dz, -dx), (0, 1, 2))
+
+    visible[255] = True
+    visible[:, 0::16] = visible[:, 15::16] = True
+    visible[:, :, 0::16] = visible[:, :, 15::16] = True
+
+    return visible & ~air
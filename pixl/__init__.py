@@ -0,0 +1 @@
+# the generator is in main.py, run it with python -m pixl (see python -m pixl --help)
@@ -1,9 +1,8 @@
-from opensimplex import OpenSimplex  # pip install opensimplex
 from time import perf_counter as pf
 from random import Random
-import numpy
 import math
-import sys
+
+# opensimplex and numpy are imported where they're used, so importing this module is cheap
 # here, a "chunk" refers to a 256x16x16 array of block states
 
 palette = {"air": 0, "bedrock": 1, "stone": 2, "dirt": 3, "grass": 4, "water": 5, "diamond_ore": 6, "coal_ore": 7,
@@ -13,6 +12,8 @@ palette = {**palette, **{v: k for k, v in palette.items()}}
 
 
 def blank_chunk() -> list:  # used to test dumping to a obj file
+    import numpy
+
     #                       y   z   x
     chunk = numpy.zeros((256, 16, 16), numpy.uint64)  # kinda how chunks are stored in pymine
 
@@ -425,39 +426,148 @@ def dump_to_obj(file, chunks: dict) -> None:
     file.write("\n".join([f"v {p[0]} {p[1]} {p[2]}" for p in points.values()]) + "\n" + "\n".join(faces.values()) + "\n")
     print(num_blocks)
 
-with open("test.obj", "w+") as f:
-    seed = 1281134870109837483
+def load_terrain(cache_dir: str, seed: int, cx: int, cz: int):
+    # terrain only depends on the seed and the chunk, so it's cached per those
+    import os
+    import numpy
+
+    path = os.path.join(cache_dir, f"pixl-terrain-{seed}", f"{cx}.{cz}.npy")
+
+    if os.path.exists(path):
+        return numpy.load(path).tolist()
+
+    return None
+
+
+def save_terrain(cache_dir: str, seed: int, cx: int, cz: int, chunk: list) -> None:
+    import os
+    import numpy
+
+    path = os.path.join(cache_dir, f"pixl-terrain-{seed}")
+    os.makedirs(path, exist_ok=True)
+
+    numpy.save(os.path.join(path, f"{cx}.{cz}.npy"), numpy.array(chunk, numpy.uint8))
+
+
+worker_noise = None  # each terrain worker's own OpenSimplex, see init_worker()
+
+
+def init_worker(seed: int) -> None:
+    from opensimplex import OpenSimplex
+
+    global worker_noise
+    worker_noise = OpenSimplex(seed=seed)
+
+
+def terrain_chunk(key: tuple) -> list:
+    return noisy_chunk(worker_noise, None, *key)
+
+
+def generate_world(seed: int, radius: int, stages=("terrain",), workers: int = 1, cache_dir: str = None) -> dict:
+    """Generates the chunks from -radius to radius on both axes. Ores and worms are opt in, see stages.
+
+    The terrain of the chunks is generated by workers processes (it doesn't use randomness), and
+    cached in cache_dir if it's given. Ores and worms are always added in this process.
+    """
+
+    from opensimplex import OpenSimplex  # pip install opensimplex
+
     randomness = Random(seed)
     noise = OpenSimplex(seed=seed)
     chunks = {}
 
-    radius = 1 if len(sys.argv) < 2 else int(sys.argv[1])
-
     print(f"Generating {(radius*2)**2} chunks...")
     start = pf()
 
-    for x in range(-radius, radius):
-        for z in range(-radius, radius):
-            chunks[x, z] = noisy_chunk(noise, randomness, x, z)
+    keys = [(x, z) for x in range(-radius, radius) for z in range(-radius, radius)]
+
+    for key in keys:
+        chunks[key] = None if cache_dir is None else load_terrain(cache_dir, seed, *key)
+
+    missing = [key for key in keys if chunks[key] is None]
+
+    if workers > 1 and len(missing) > 1:
+        from multiprocessing import Pool
+
+        with Pool(workers, init_worker, (seed,)) as pool:
+            generated = pool.map(terrain_chunk, missing)
+    else:
+        generated = [noisy_chunk(noise, randomness, *key) for key in missing]
+
+    for key, chunk in zip(missing, generated):
+        chunks[key] = chunk
+
+        if cache_dir is not None:
+            save_terrain(cache_dir, seed, *key, chunk)
 
     print(f"Done generating chunks. ({(pf() - start):02.02f} seconds for {len(chunks)} chunks)")
 
-    # print("Adding ore pockets...")
-    # start = pf()
-    #
-    # chunks = make_ore_pockets(chunks, randomness, noise)
-    #
-    # print(f"Ore pockets made! ({(pf()-start):02.02f} seconds)")
-    #
-    # print("Activating wormy bois...")
-    # start = pf()
-    #
-    # chunks, n = wormy_bois(chunks, randomness, noise)
-    #
-    # print(f"Wormy bois finished. ({(pf() - start):02.02f} seconds for {n} wormy bois)")
-
-    print("Dumping to obj file...")
-    start = pf()
+    if "ores" in stages:
+        print("Adding ore pockets...")
+        start = pf()
+
+        chunks = make_ore_pockets(chunks, randomness, noise)
+
+        print(f"Ore pockets made! ({(pf()-start):02.02f} seconds)")
+
+    if "worms" in stages:
+        print("Activating wormy bois...")
+        start = pf()
+
+        chunks, n = wormy_bois(chunks, randomness, noise)
+
+        print(f"Wormy bois finished. ({(pf() - start):02.02f} seconds for {n} wormy bois)")
+
+    return chunks
+
+
+def world_array(chunks: dict):
+    """The chunks as one (256, Z, X) uint8 array, z and x going up from the lowest chunk."""
+
+    import numpy
+
+    cxs = [cx for cx, cz in chunks.keys()]
+    czs = [cz for cx, cz in chunks.keys()]
+    min_cx, min_cz = min(cxs), min(czs)
+
+    blocks = numpy.zeros((256, (max(czs) - min_cz + 1) * 16, (max(cxs) - min_cx + 1) * 16), numpy.uint8)
+
+    for (cx, cz), chunk in chunks.items():
+        z = (cz - min_cz) * 16
+        x = (cx - min_cx) * 16
+        blocks[:, z : z + 16, x : x + 16] = chunk
+
+    return blocks
+
+
+def main(argv: list = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="pixl", description="Generates a world and exports it.")
+    parser.add_argument("radius", type=int, nargs="?", default=1, help="chunks from the origin on each axis")
+    parser.add_argument("--seed", type=int, default=1281134870109837483)
+    parser.add_argument("--stages", default="terrain", help="comma separated, any of terrain, ores and worms")
+    parser.add_argument("--workers", type=int, default=1, help="processes to generate terrain with")
+    parser.add_argument("--cache-dir", help="directory to cache generated terrain in")
+    parser.add_argument("--output", default="test.obj")
+    parser.add_argument("--format", choices=("obj", "npy", "none"), default="obj", help="npy is a (256, Z, X) block array")
+    args = parser.parse_args(argv)
+
+    chunks = generate_world(args.seed, args.radius, args.stages.split(","), args.workers, args.cache_dir)
+
+    if args.format == "obj":
+        print("Dumping to obj file...")
+        start = pf()
+
+        with open(args.output, "w+") as f:
+            dump_to_obj(f, chunks)
+
+        print(f"Done dumping. ({(pf() - start):02.02f} seconds for {len(chunks)} chunks)")
+    elif args.format == "npy":
+        import numpy
+
+        numpy.save(args.output, world_array(chunks))
+
 
-    dump_to_obj(f, chunks)
-    print(f"Done dumping. ({(pf() - start):02.02f} seconds for {len(chunks)} chunks)")
+if __name__ == "__main__":
+    main()